@@ -1,45 +1,29 @@
 import pandas as pd
-import plotly.express as px
 import streamlit as st
-import requests
-import os
+import time
 
-TOKEN = "3GESW9TDeo7A1Jy2T5s1v8"
+from core import fetch
+from core.bancos import METRICS
+from core.charts import line_figure
+from core.debug import fim_da_execucao, mostrar_grafico
+from core.history import RANGES
+from core.perf import counted_cache, span, timed_section
+from core.portfolio import REBALANCE, align_closes, backtest, normalize_weights, parse_weights
+from core.recursos import bank_store, history_store, quote_client
+
+inicio_execucao = time.perf_counter()
 
 st.set_page_config(page_title="Bancos & Investimentos", layout="wide")
+
 st.title("Smooth Invest")
 
-filepath = os.path.join(os.path.dirname(__file__), "bancos_investimentos.csv")
-df = pd.read_csv(filepath)
-    
-metrics = ["Renda Fixa", "Ações", "FIIs", "Câmbio", "COE", "Crédito"]
-df["Total"] = df[metrics].sum(axis=1)
-
-col1, col2, col3 = st.columns([1, 1, 2])
-with col1:
-    metric = st.selectbox("Métrica", metrics, index=0)
-with col2:
-    sort_dir = st.selectbox("Ordenação", ["Maior → menor", "Menor → maior"])
-with col3:
-    search = st.text_input("Pesquisar banco...", "")
-
-dff = df[df["Banco"].str.contains(search, case=False, na=False)].copy()
-dff = dff.sort_values(metric, ascending=(sort_dir == "Menor → menor"))
-
-k1, k2, k3, k4 = st.columns(4)
-with k1:
-    st.metric("Total Carteira", f"{dff[metrics].sum().sum():,.0f}")
-with k2:
-    st.metric("Média por Banco", f"{dff['Total'].mean():,.0f}")
-with k3:
-    st.metric(f"Top {metric}", f"{dff.iloc[0]['Banco'] if len(dff) else '-'}")
-with k4:
-    st.metric("Nº Bancos", f"{len(dff)}")
-
-c1, c2 = st.columns([2, 1])
-with c1:
+
+@counted_cache("grafico_barras", st.cache_data(max_entries=256, show_spinner=False))
+def grafico_barras(versao, search, metric, sort_dir, _dff):
+    import plotly.express as px
+
     fig_bar = px.bar(
-        dff,
+        _dff,
         x="Banco",
         y=metric,
         color=metric,
@@ -47,113 +31,284 @@ with c1:
         title=f"Comparativo — {metric}",
         height=400,
     )
-    st.plotly_chart(fig_bar, use_container_width=True)
+    return fig_bar
 
-with c2:
-    totals = dff[metrics].sum().reset_index()
+
+@counted_cache("grafico_pizza", st.cache_data(max_entries=256, show_spinner=False))
+def grafico_pizza(versao, search, _totals):
+    import plotly.express as px
+
+    totals = _totals.reset_index()
     totals.columns = ["Classe", "Valor"]
-    fig_pie = px.pie(totals, names="Classe", values="Valor", title="Participação por Classe", height=420)
-    st.plotly_chart(fig_pie, use_container_width=True)
+    return px.pie(totals, names="Classe", values="Valor", title="Participação por Classe", height=420)
 
-st.title("Cotação de Ações — Brapi")
 
-ticker = st.text_input("Digite o ticker da ação:", "MXRF11")
-headers = {"Authorization": f"Bearer TOKEN"}
+metrics = METRICS
 
-if st.button("Buscar cotação"):
-    url = f"https://brapi.dev/api/quote/{ticker.upper()}"
-    response = requests.get(url, headers=headers)
 
-    if response.status_code == 200:
-        data = response.json()["results"][0]
+@st.fragment
+@timed_section("App — painel de bancos")
+def painel_bancos():
+    data = bank_store().current()
 
-        st.metric("Preço Atual", f"R$ {data['regularMarketPrice']:.2f}")
-        st.metric("Variação do Dia", f"{data['regularMarketChangePercent']:.2f}%")
-        st.metric("Máxima do Dia", f"R$ {data['regularMarketDayHigh']}")
-        st.metric("Mínima do Dia", f"R$ {data['regularMarketDayLow']}")
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        metric = st.selectbox("Métrica", metrics, index=0)
+    with col2:
+        sort_dir = st.selectbox("Ordenação", ["Maior → menor", "Menor → maior"])
+    with col3:
+        search = st.text_input("Pesquisar banco...", "")
 
-        hist_url = f"https://brapi.dev/api/quote/{ticker.upper()}?range=1mo&interval=1d"
-        hist_resp = requests.get(hist_url, headers=headers)
-        if hist_resp.status_code == 200:
-            hist = hist_resp.json()["results"][0]["historicalDataPrice"]
-            df_hist = pd.DataFrame(hist)
-            df_hist["date"] = pd.to_datetime(df_hist["date"], unit="s")
-            fig_line = px.line(df_hist, x="date", y="close", title=f"Histórico {ticker.upper()}")
-            st.plotly_chart(fig_line, use_container_width=True)
+    dff = data.search(search)
+    dff = dff.sort_values(metric, ascending=(sort_dir == "Menor → maior"))
 
+    filtrado = len(dff) != len(data.by_bank)
+    if filtrado:
+        total_carteira, media_banco = dff[metrics].to_numpy().sum(), dff["Total"].mean()
     else:
-        st.error(f"Erro {response.status_code}: {response.text}")
+        total_carteira, media_banco = data.total, data.mean_total
 
-st.title("Top 5 Ações Brasil")
+    k1, k2, k3, k4 = st.columns(4)
+    with k1:
+        st.metric("Total Carteira", f"{total_carteira:,.0f}")
+    with k2:
+        st.metric("Média por Banco", f"{media_banco:,.0f}")
+    with k3:
+        st.metric(f"Top {metric}", f"{dff.iloc[0]['Banco'] if len(dff) else '-'}")
+    with k4:
+        st.metric("Nº Bancos", f"{len(dff)}")
+
+    c1, c2 = st.columns([2, 1])
+    with c1:
+        fig_bar = grafico_barras(data.version, search.strip().casefold(), metric, sort_dir, dff)
+        mostrar_grafico("App — barras", fig_bar)
+
+    with c2:
+        totals = dff[metrics].sum() if filtrado else data.class_totals
+        fig_pie = grafico_pizza(data.version, search.strip().casefold(), totals)
+        mostrar_grafico("App — pizza", fig_pie)
+
+    st.subheader("Tabela de Detalhes")
+    st.dataframe(dff.reset_index(drop=True), hide_index=True, use_container_width=True)
+
+
+painel_bancos()
+
+st.title("Cotação de Ações — Brapi")
 
-TOKEN = "Bearer 3GESW9TDeo7A1Jy2T5s1v8" 
-
-top0_actions = ["PETR4"] 
-top1_actions = ["VALE3"] 
-top2_actions = ["ITUB4"] 
-top3_actions = ["MXRF11"] 
-top4_actions = ["BBAS3"] 
-
-def get_quotes(tickers): 
-    url = f"https://brapi.dev/api/quote/{','.join(tickers)}" 
-    headers = {"Authorization": TOKEN} 
-    resp = requests.get(url, headers=headers) 
-    if resp.status_code == 200: 
-        return resp.json().get("results", []) 
-    else: 
-        st.error(f"Erro {resp.status_code}: {resp.text}") 
-        return []
-    
-acoes = get_quotes(top0_actions) 
-acoes1 = get_quotes(top1_actions) 
-acoes2 = get_quotes(top2_actions) 
-acoes3 = get_quotes(top3_actions) 
-acoes4 = get_quotes(top4_actions) 
-
-if acoes: 
-    tabela = [] 
-    for acao in acoes: 
-        tabela.append({ 
+l1, l2 = st.columns([1, 3])
+with l1:
+    ao_vivo = st.toggle("Cotações ao vivo", value=False, key="ao_vivo")
+with l2:
+    intervalo = st.select_slider("Atualizar a cada (s)", options=[5, 10, 15, 30, 60], value=15, disabled=not ao_vivo)
+
+# Os fragmentos reexecutam sozinhos no modo ao vivo, sem rodar a página inteira
+# (CSV, gráficos e histórico ficam como estão).
+run_every = intervalo if ao_vivo else None
+
+
+@st.fragment(run_every=run_every)
+@timed_section("App — métricas do ticker")
+def metricas_ticker(symbol):
+    try:
+        cotacao = quote_client().get_quotes([symbol])
+    except fetch.RequestException as e:
+        st.error(f"Erro ao buscar cotação: {e}")
+        return
+    if not cotacao:
+        return
+
+    data_cotacao = cotacao[0]
+    st.metric("Preço Atual", f"R$ {data_cotacao['regularMarketPrice']:.2f}")
+    st.metric("Variação do Dia", f"{data_cotacao['regularMarketChangePercent']:.2f}%")
+    st.metric("Máxima do Dia", f"R$ {data_cotacao['regularMarketDayHigh']}")
+    st.metric("Mínima do Dia", f"R$ {data_cotacao['regularMarketDayLow']}")
+
+
+@st.fragment(run_every=run_every)
+@timed_section("App — Top 5")
+def painel_top5():
+    client = quote_client()
+    versao_vista = st.session_state.get("top5_versao", client.version)
+
+    try:
+        acoes = client.get_quotes(top_actions)
+    except fetch.RequestException as e:
+        st.error(f"Erro ao buscar cotações: {e}")
+        return
+    if not acoes:
+        return
+
+    alterados = client.changed_since(versao_vista, top_actions)
+    st.session_state["top5_versao"] = client.version
+
+    tabela = []
+    for acao in acoes:
+        tabela.append({
             "Ticker": acao["symbol"],
             "Empresa": acao.get("longName", "-"),
             "Preço": f"R$ {acao['regularMarketPrice']:.2f}",
-            "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%", 
-            "Volume": f"{acao['regularMarketVolume']:,}" 
-            }) 
-        for acao in acoes1: 
-            tabela.append({ 
-                "Ticker": acao["symbol"], 
-                "Empresa": acao.get("longName", "-"), 
-                "Preço": f"R$ {acao['regularMarketPrice']:.2f}", 
-                "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%", 
-                "Volume": f"{acao['regularMarketVolume']:,}" 
-                }) 
-        for acao in acoes2: 
-            tabela.append({ 
-                "Ticker": acao["symbol"], 
-                "Empresa": acao.get("longName", "-"), 
-                "Preço": f"R$ {acao['regularMarketPrice']:.2f}", 
-                "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%", 
-                "Volume": f"{acao['regularMarketVolume']:,}" 
-                }) 
-        for acao in acoes3: 
-            tabela.append({ 
-                "Ticker": acao["symbol"], 
-                "Empresa": acao.get("longName", "-"), 
-                "Preço": f"R$ {acao['regularMarketPrice']:.2f}", 
-                "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%", 
-                "Volume": f"{acao['regularMarketVolume']:,}" 
-                }) 
-        for acao in acoes4: 
-            tabela.append({ 
-                "Ticker": acao["symbol"], 
-                "Empresa": acao.get("longName", "-"), 
-                "Preço": f"R$ {acao['regularMarketPrice']:.2f}", 
-                "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%", 
-                "Volume": f"{acao['regularMarketVolume']:,}" 
-                }) 
-                
-    st.table(tabela)
-
-st.subheader("Tabela de Detalhes")
-st.dataframe(dff.reset_index(drop=True), hide_index=True, use_container_width=True)
+            "Variação (%)": f"{acao['regularMarketChangePercent']:.2f}%",
+            "Volume": f"{acao['regularMarketVolume']:,}"
+        })
+
+    df_top5 = pd.DataFrame(tabela)
+    destaque = df_top5["Ticker"].str.upper().isin(alterados)
+    st.table(df_top5.style.apply(
+        lambda row: ["background-color: #fef9c3" if destaque[row.name] else ""] * len(row),
+        axis=1
+    ))
+    if ao_vivo:
+        st.caption(f"{len(alterados)} cotação(ões) alterada(s) desde a última atualização")
+
+
+@st.fragment
+@timed_section("App — consulta de ticker")
+def consulta_ticker():
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        ticker = st.text_input("Digite o ticker da ação:", "MXRF11")
+    with col2:
+        periodo = st.selectbox("Período do histórico", list(RANGES), index=list(RANGES).index("1mo"))
+
+    if st.button("Buscar cotação"):
+        st.session_state["ticker_consultado"] = ticker.strip().upper()
+
+    ticker_consultado = st.session_state.get("ticker_consultado")
+    if ticker_consultado:
+        metricas_ticker(ticker_consultado)
+
+        try:
+            with span("fetch", "brapi — histórico"):
+                df_hist = history_store().historico(ticker_consultado, periodo)
+        except fetch.RequestException as e:
+            st.warning(f"Histórico indisponível: {e}")
+            df_hist = history_store().ler(ticker_consultado, periodo)
+        if not df_hist.empty:
+            fig_line = line_figure(df_hist["date"], {ticker_consultado: df_hist["close"]})
+            fig_line.update_layout(title=f"Histórico {ticker_consultado}", showlegend=False)
+            mostrar_grafico("App — histórico", fig_line)
+
+
+consulta_ticker()
+
+st.title("Top 5 Ações Brasil")
+
+top_actions = ["PETR4", "VALE3", "ITUB4", "MXRF11", "BBAS3"]
+
+painel_top5()
+
+
+@counted_cache("backtest_carteira", st.cache_data(max_entries=64, show_spinner=False))
+def backtest_carteira(chave, pesos, rebalance, inicial, _precos):
+    return backtest(_precos, pd.Series(dict(pesos)), rebalance, inicial)
+
+
+@st.fragment
+@timed_section("App — carteira")
+def painel_carteira():
+    st.title("Carteira — backtest")
+    if not st.checkbox("Simular uma carteira com vários tickers", key="carteira_mode"):
+        return
+
+    texto = st.text_area(
+        "Tickers e pesos (%)",
+        ", ".join(top_actions),
+        help="Ex.: PETR4 30, VALE3 20, ITUB4. Tickers sem peso dividem igualmente o restante.",
+        key="carteira_tickers",
+    )
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        periodo = st.selectbox("Período", ["1y", "2y", "5y", "10y", "max"], index=3, key="carteira_periodo")
+    with c2:
+        rebalanceamento = st.selectbox("Rebalanceamento", list(REBALANCE), index=2, key="carteira_rebalance")
+    with c3:
+        inicial = st.number_input("Valor inicial (R$)", min_value=100.0, value=10000.0, step=1000.0, key="carteira_inicial")
+
+    try:
+        pesos = normalize_weights(parse_weights(texto))
+    except ValueError:
+        st.error("Pesos inválidos: use números positivos, ex.: PETR4 30, VALE3 20")
+        return
+    if pesos.empty:
+        st.info("Informe ao menos um ticker.")
+        return
+
+    with st.spinner(f"Carregando o histórico de {len(pesos)} ticker(s)..."):
+        with span("fetch", "brapi — históricos da carteira"):
+            fechamentos, erros = history_store().historicos(list(pesos.index), periodo)
+    if erros:
+        st.warning("Sem dados atualizados para: " + ", ".join(sorted(erros)))
+
+    precos = align_closes({t: fechamentos[t] for t in fechamentos.columns})
+    faltando = [t for t in pesos.index if t not in precos.columns]
+    if faltando:
+        st.warning("Fora da carteira (sem histórico): " + ", ".join(faltando))
+    if len(precos) < 2:
+        st.info("Histórico insuficiente para o backtest.")
+        return
+
+    pesos = pesos.reindex(precos.columns)
+    pesos = pesos / pesos.sum()
+    chave = (tuple(precos.columns), str(precos.index[0].date()), str(precos.index[-1].date()), len(precos))
+    resultado = backtest_carteira(
+        chave, tuple(pesos.round(10).items()), REBALANCE[rebalanceamento], inicial, precos
+    )
+    stats, hold_stats = resultado["stats"], resultado["hold_stats"]
+
+    st.caption(
+        f"{len(precos.columns)} ativo(s), {len(precos)} pregões de "
+        f"{precos.index[0]:%d/%m/%Y} a {precos.index[-1]:%d/%m/%Y}"
+    )
+    k1, k2, k3, k4 = st.columns(4)
+    with k1:
+        st.metric("Valor final", f"R$ {resultado['curve'].iloc[-1]:,.2f}", f"{stats['total']:.1%}")
+    with k2:
+        st.metric("Retorno anualizado", f"{stats['cagr']:.2%}", f"{stats['cagr'] - hold_stats['cagr']:+.2%} vs. sem rebalancear")
+    with k3:
+        st.metric("Volatilidade anual", f"{stats['vol']:.2%}")
+    with k4:
+        st.metric("Pior queda", f"{stats['max_drawdown']:.2%}")
+
+    fig_curva = line_figure(
+        resultado["curve"].index,
+        {f"Rebalanceamento {rebalanceamento.lower()}": resultado["curve"], "Sem rebalancear": resultado["hold"]},
+    )
+    fig_curva.update_layout(title="Evolução da carteira", yaxis_title="R$")
+    mostrar_grafico("App — carteira", fig_curva)
+
+    fig_queda = line_figure(resultado["drawdown"].index, {"Queda desde o pico": resultado["drawdown"] * 100})
+    fig_queda.update_layout(title="Drawdown (%)", showlegend=False)
+    mostrar_grafico("App — drawdown", fig_queda)
+
+    ativos = resultado["assets"].rename(columns={
+        "weight": "Peso (%)", "cagr": "Retorno a.a. (%)", "vol": "Volatilidade a.a. (%)",
+        "max_drawdown": "Pior queda (%)", "risk_share": "Contribuição ao risco (%)",
+    }) * 100
+    st.subheader("Ativos")
+    st.dataframe(
+        ativos.rename_axis("Ticker").reset_index(),
+        hide_index=True,
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.2f") for c in ativos.columns},
+    )
+
+    import plotly.express as px
+
+    fig_corr = px.imshow(
+        resultado["correlation"],
+        color_continuous_scale="RdBu_r",
+        zmin=-1,
+        zmax=1,
+        aspect="auto",
+        title="Correlação dos retornos diários",
+    )
+    fig_corr.update_layout(height=max(400, 14 * len(precos.columns)))
+    mostrar_grafico("App — correlação", fig_corr)
+    with st.expander("Matriz de covariância (anualizada)"):
+        st.dataframe(resultado["covariance"], use_container_width=True)
+
+
+painel_carteira()
+
+fim_da_execucao("App", inicio_execucao)
@@ -0,0 +1,207 @@
+# Micro-benchmarks dos kernels financeiros de core/ (sem Streamlit).
+#
+# Cada execução é anexada a data/bench/kernels.jsonl (ou SMOOTH_DATA_DIR). O
+# tempo de cada caso é comparado com a mediana das últimas execuções na mesma
+# máquina; se algum ficar mais lento que o limite, o comando sai com código 1.
+# Exemplo (a partir de TCC/):
+#
+#     python -m bench.kernels --limite 0.25
+#     python -m bench.kernels --filtro sweep --nao-salvar
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from core.amortization import pmt, price_schedule, sac_schedule  # noqa: E402
+from core.loans import implied_rate  # noqa: E402
+from core.lots import simulate_lots  # noqa: E402
+from core.montecarlo import simulate  # noqa: E402
+from core.portfolio import backtest  # noqa: E402
+from core.projection import compound_with_contributions, final_balance, project, sweep  # noqa: E402
+from core.storage import DATA_DIR  # noqa: E402
+from core.tax import apply_tax_and_inflation, ir_rate_by_days  # noqa: E402
+
+# Em data/ (fora do git): rodar o benchmark não suja a árvore.
+HISTORICO = os.path.join(DATA_DIR, "bench", "kernels.jsonl")
+
+
+def _historico_mc(meses=300, semente=0):
+    rng = np.random.default_rng(semente)
+    return rng.normal(0.008, 0.002, meses), rng.normal(0.004, 0.003, meses)
+
+
+def casos():
+    # (nome, função sem argumentos). Os dados de entrada são montados aqui,
+    # fora da medição.
+    rng = np.random.default_rng(0)
+    lista = []
+
+    for anos in (10, 50):
+        lista.append((f"project mensal {anos}a", lambda a=anos: project(10_000, 500, 0.008, a * 12)))
+        lista.append((
+            f"compound_with_contributions diária {anos}a",
+            lambda a=anos: compound_with_contributions(10_000, 500, 0.1, a, days_per_month=30),
+        ))
+
+    for n in (1_000, 1_000_000):
+        dias = rng.integers(0, 3650, n)
+        bruto = rng.uniform(1e4, 1e6, n)
+        anos = dias / 365
+        lista.append((f"ir_rate_by_days n={n}", lambda d=dias: ir_rate_by_days(d)))
+        lista.append((
+            f"apply_tax_and_inflation n={n}",
+            lambda b=bruto, a=anos: apply_tax_and_inflation(b, b * 0.8, a, 0.04),
+        ))
+        taxas = rng.uniform(0, 0.03, n)
+        lista.append((f"final_balance n={n}", lambda t=taxas: final_balance(10_000, 500, t, 360)))
+
+    for n in (360, 600):
+        extras = dict.fromkeys(range(12, n + 1, 12), 1_000.0)
+        lista.append((f"pmt n={n}", lambda n=n: pmt(300_000, 0.009, n)))
+        lista.append((f"price_schedule n={n}", lambda n=n, e=extras: price_schedule(300_000, 0.009, n, prepayments=e)))
+        lista.append((f"sac_schedule n={n}", lambda n=n, e=extras: sac_schedule(300_000, 0.009, n, prepayments=e)))
+
+    for n in (1_000, 100_000):
+        pv = rng.uniform(5_000, 100_000, n)
+        prazo = rng.integers(6, 120, n)
+        taxa = rng.uniform(0.005, 0.04, n)
+        parcela = pv * taxa / (1 - (1 + taxa) ** -prazo)
+        lista.append((f"implied_rate n={n}", lambda pv=pv, p=parcela, n_=prazo: implied_rate(pv, p, n_)))
+
+    for tamanho in ((10, 10, 10, 5), (100, 50, 50, 5)):
+        r, y, c, i = tamanho
+        eixos = (np.linspace(0.02, 0.2, r), np.arange(1, y + 1), np.linspace(0, 5_000, c), np.linspace(0.02, 0.08, i))
+        lista.append((f"sweep {r}x{y}x{c}x{i}", lambda e=eixos: sweep(10_000, *e)))
+
+    for cenarios in (1, 1_000):
+        taxas = rng.normal(0.008, 0.002, (cenarios, 600))
+        resgates = dict.fromkeys(range(240, 601, 12), 2_000.0)
+        lista.append((
+            f"simulate_lots 600 lotes x {cenarios} cenários",
+            lambda t=taxas, w=resgates: simulate_lots(10_000, 500, t, 600, withdrawals=w, come_cotas=True),
+        ))
+
+    for ativos in (5, 50):
+        datas = pd.bdate_range("2015-01-01", periods=2_520)
+        precos = pd.DataFrame(20 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, (len(datas), ativos)), axis=0)), index=datas)
+        pesos = np.full(ativos, 1 / ativos)
+        lista.append((
+            f"backtest carteira {ativos} ativos 10a mensal",
+            lambda p=precos, w=pesos: backtest(p, w, "M"),
+        ))
+
+    taxas, inflacao = _historico_mc()
+    for trajetorias in (10_000, 100_000):
+        lista.append((
+            f"simulate {trajetorias} trajetórias 30a",
+            lambda t=trajetorias: simulate(taxas, inflacao, 10_000, 500, 30, paths=t),
+        ))
+    return lista
+
+
+def medir(fn, repeticoes=5, alvo=0.2):
+    # Calibra quantas chamadas cabem em ~alvo/repetições e fica com o melhor lote:
+    # o mínimo é o estimador menos sensível a ruído de outros processos.
+    inicio = time.perf_counter()
+    fn()
+    uma = time.perf_counter() - inicio
+    chamadas = max(1, int(alvo / repeticoes / max(uma, 1e-9)))
+    melhores = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            fn()
+        melhores.append((time.perf_counter() - inicio) / chamadas)
+    return min(melhores)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _maquina():
+    return f"{platform.node()}|{platform.machine()}|{platform.python_version()}|numpy {np.__version__}"
+
+
+def carregar_historico(path=HISTORICO):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(linha) for linha in f if linha.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def referencia(historico, maquina, janela=5):
+    # Mediana das últimas `janela` execuções desta máquina, por caso.
+    tempos = {}
+    for execucao in historico:
+        if execucao.get("maquina") != maquina:
+            continue
+        for nome, segundos in execucao["resultados"].items():
+            tempos.setdefault(nome, []).append(segundos)
+    return {nome: float(np.median(valores[-janela:])) for nome, valores in tempos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos kernels financeiros.")
+    parser.add_argument("--filtro", default="", help="roda só os casos cujo nome contém este texto")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--limite", type=float, default=0.25, help="lentidão tolerada sobre a referência (0.25 = 25%%)")
+    parser.add_argument("--janela", type=int, default=5, help="execuções anteriores usadas como referência")
+    parser.add_argument("--historico", default=HISTORICO)
+    parser.add_argument("--nao-salvar", action="store_true", help="não anexa esta execução ao histórico")
+    args = parser.parse_args()
+
+    maquina = _maquina()
+    base = referencia(carregar_historico(args.historico), maquina, args.janela)
+
+    resultados, regressoes = {}, []
+    for nome, fn in casos():
+        if args.filtro not in nome:
+            continue
+        segundos = medir(fn, args.repeticoes)
+        resultados[nome] = segundos
+
+        anterior = base.get(nome)
+        if anterior is None:
+            comparacao = "sem referência"
+        else:
+            variacao = segundos / anterior - 1
+            comparacao = f"{variacao:+.1%}"
+            if variacao > args.limite:
+                regressoes.append(nome)
+                comparacao += "  <-- REGRESSÃO"
+        print(f"{nome:45s} {segundos * 1000:12.4f} ms   {comparacao}")
+
+    if not args.nao_salvar and resultados:
+        os.makedirs(os.path.dirname(args.historico), exist_ok=True)
+        with open(args.historico, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "data": datetime.now().isoformat(timespec="seconds"),
+                "commit": _commit(),
+                "maquina": maquina,
+                "resultados": resultados,
+            }, ensure_ascii=False) + "\n")
+
+    if regressoes:
+        print(f"\n{len(regressoes)} caso(s) mais lentos que {args.limite:.0%} sobre a referência.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# Teste de carga do app inteiro contra os stand-ins de bench/stubs.py.
+#
+# Cada sessão é um AppTest que percorre um roteiro de interações da página;
+# as sessões rodam em paralelo no mesmo processo, então compartilham os caches
+# de st.cache_data/st.cache_resource como num servidor de verdade. Exemplo
+# (a partir de TCC/):
+#
+#     python -m bench.load --sessoes 8 --latencia 0.08 --erros 0.02
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _por_rotulo(widgets, rotulo):
+    for w in widgets:
+        if w.label == rotulo:
+            return w
+    raise KeyError(rotulo)
+
+
+# Roteiros: (descrição, ação no AppTest antes do rerun). A primeira etapa é a carga.
+ROTEIROS = {
+    "App.py": [
+        ("carga", None),
+        ("pesquisa", lambda at: _por_rotulo(at.text_input, "Pesquisar banco...").input("ban")),
+        ("métrica", lambda at: _por_rotulo(at.selectbox, "Métrica").select("Ações")),
+        ("ordenação", lambda at: _por_rotulo(at.selectbox, "Ordenação").select("Menor → maior")),
+        ("buscar ticker", lambda at: _por_rotulo(at.button, "Buscar cotação").click()),
+        ("período", lambda at: _por_rotulo(at.selectbox, "Período do histórico").select("1y")),
+        ("carteira", lambda at: at.checkbox(key="carteira_mode").check()),
+        ("rebalanceamento", lambda at: at.selectbox(key="carteira_rebalance").select("Trimestral")),
+    ],
+    "pages/Dados governo.py": [
+        ("carga", None),
+        ("indicador", lambda at: _por_rotulo(at.selectbox, "Indicador Principal").select("433")),
+        ("período", lambda at: at.slider(key="anos_slider").set_value(8)),
+        ("comparação", lambda at: at.checkbox(key="modo_comparacao").check()),
+        ("normalizar", lambda at: at.checkbox(key="normalizar_comparacao").check()),
+    ],
+    "pages/Parcelas e juros.py": [
+        ("carga", None),
+        ("juros compostos", lambda at: _por_rotulo(at.button, "Calcular Juros Compostos").click()),
+        ("amortização", lambda at: at.checkbox(key="show_amort").check()),
+        ("SAC", lambda at: at.radio(key="sistema_amort").set_value("SAC")),
+        ("extra", lambda at: at.number_input(key="extra_valor").set_value(1000.0)),
+    ],
+    "pages/Simulador de investimento.py": [
+        ("carga", None),
+        ("horizonte", lambda at: _por_rotulo(at.slider, "Horizonte (anos)").set_value(20)),
+        ("varredura", lambda at: at.checkbox(key="sweep_mode").check()),
+        ("monte carlo", lambda at: at.checkbox(key="mc_mode").check()),
+        ("trajetórias", lambda at: _por_rotulo(at.number_input, "Número de trajetórias").set_value(20_000)),
+    ],
+}
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        # Sem /proc: usa o pico, que só cresce.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _compartilhar_bytecode():
+    # O servidor compila cada página uma vez (um ScriptCache por Runtime); o AppTest
+    # recompila a cada run. Além de inflar o tempo medido, compilar em paralelo
+    # dispara um bug de ast.parse concorrente no CPython 3.11.
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    compartilhado = ScriptCache()
+    original = ScriptCache.get_bytecode
+    ScriptCache.get_bytecode = lambda self, script_path: original(compartilhado, script_path)
+
+
+def _compartilhar_runtime():
+    # Cada AppTest.run instala um Runtime falso global e o apaga (None) ao terminar;
+    # com sessões em paralelo, uma sessão que termina derruba a que ainda está
+    # rodando ("Runtime hasn't been created!"). Mantém o último Runtime visível.
+    from streamlit.runtime import Runtime
+
+    ultimo = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            ultimo["runtime"] = cls._instance
+        if "runtime" not in ultimo:
+            raise RuntimeError("Runtime hasn't been created!")
+        return cls._instance or ultimo["runtime"]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or "runtime" in ultimo)
+
+
+def _fixar_modo_teste():
+    # AppTest.run liga global.appTest só durante o run e depois restaura o valor que
+    # encontrou; entre sessões paralelas, uma pode desligá-lo no meio do run de outra
+    # (os format_func dos selectbox deixam de ser registrados). Ligado antes de todas,
+    # o valor restaurado é sempre o mesmo.
+    from streamlit import config
+
+    config.set_option("global.appTest", True)
+
+
+def _fixar_paginas(pagina):
+    # O AppTest também zera PagesManager.uses_pages_directory a cada run; se outra
+    # sessão lê o valor nesse intervalo, executa o script fora do modo multipágina,
+    # os widgets ganham outros IDs e as interações se perdem. O valor depende só da
+    # página, então o ScriptRunner passa a ler um valor fixo.
+    from streamlit.runtime.pages_manager import PagesManager
+    from streamlit.runtime.scriptrunner import script_runner
+
+    paginas = os.path.isdir(os.path.join(os.path.dirname(os.path.join(RAIZ, pagina)), "pages"))
+    script_runner.PagesManager = type("PagesManagerFixo", (PagesManager,), {"uses_pages_directory": paginas})
+
+
+def sessao(pagina, roteiro, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, pagina), default_timeout=timeout)
+    tempos, erros = [], 0
+    for descricao, acao in roteiro:
+        try:
+            if acao is not None:
+                acao(at)
+            inicio = time.perf_counter()
+            at.run()
+            tempos.append((descricao, time.perf_counter() - inicio))
+            erros += len(at.exception)
+        except Exception as e:
+            # Um widget que não apareceu (ex.: a etapa anterior falhou) encerra a sessão.
+            print(f"[{pagina}] etapa '{descricao}' falhou: {e!r}", file=sys.stderr)
+            erros += 1
+            break
+    return at, tempos, erros
+
+
+def rodar_pagina(pagina, sessoes, stubs, timeout):
+    roteiro = ROTEIROS[pagina]
+    antes_chamadas = sum(s.total() for s in stubs)
+    antes_rss = _rss_mb()
+    _fixar_paginas(pagina)
+
+    with ThreadPoolExecutor(max_workers=sessoes) as pool:
+        resultados = list(pool.map(lambda _: sessao(pagina, roteiro, timeout), range(sessoes)))
+
+    depois_rss = _rss_mb()
+    chamadas = sum(s.total() for s in stubs) - antes_chamadas
+
+    tempos = np.array([t for _, ts, _ in resultados for _, t in ts]) * 1000
+    cargas = np.array([ts[0][1] for _, ts, _ in resultados if ts]) * 1000
+    reruns = np.array([t for _, ts, _ in resultados for _, t in ts[1:]]) * 1000
+    return {
+        "Página": pagina,
+        "Sessões": sessoes,
+        "Execuções": len(tempos),
+        "Carga p50 (ms)": float(np.percentile(cargas, 50)) if len(cargas) else None,
+        "Rerun p50 (ms)": float(np.percentile(reruns, 50)) if len(reruns) else None,
+        "Rerun p99 (ms)": float(np.percentile(reruns, 99)) if len(reruns) else None,
+        "Memória/sessão (MB)": (depois_rss - antes_rss) / sessoes,
+        "Chamadas externas/sessão": chamadas / sessoes,
+        "Erros": sum(e for _, _, e in resultados),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões AppTest concorrentes.")
+    parser.add_argument("--sessoes", type=int, default=4, help="sessões concorrentes por página")
+    parser.add_argument("--paginas", nargs="*", default=list(ROTEIROS), choices=list(ROTEIROS))
+    parser.add_argument("--latencia", type=float, default=0.05, help="atraso médio dos stand-ins (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 503 dos stand-ins")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="limite por rerun (s)")
+    parser.add_argument("--dados", default=None, help="diretório dos stores locais (padrão: temporário, frio)")
+    parser.add_argument("--json", default=None, help="grava os resultados neste arquivo")
+    args = parser.parse_args()
+
+    # Precisa vir antes de qualquer import de core.*, que lê as URLs ao carregar.
+    sys.path.insert(0, RAIZ)
+    from bench.stubs import iniciar
+
+    brapi, sgs = iniciar(args.latencia, args.jitter, args.erros, args.semente)
+    dados = args.dados or tempfile.mkdtemp(prefix="smooth-carga-")
+    os.environ.update({
+        "BRAPI_BASE_URL": brapi.url,
+        "BCB_BASE_URL": sgs.url,
+        "SMOOTH_DATA_DIR": dados,
+    })
+    for var in ("SGS_DB_PATH", "HISTORY_DB_PATH"):
+        os.environ.pop(var, None)
+
+    _compartilhar_bytecode()
+    _compartilhar_runtime()
+    _fixar_modo_teste()
+    try:
+        linhas = [rodar_pagina(p, args.sessoes, (brapi, sgs), args.timeout) for p in args.paginas]
+    finally:
+        brapi.stop()
+        sgs.stop()
+        if args.dados is None:
+            shutil.rmtree(dados, ignore_errors=True)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(pd.DataFrame(linhas).round(1).to_string(index=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
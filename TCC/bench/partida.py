@@ -0,0 +1,158 @@
+# Tempo de partida de cada página num processo Python novo (a partida a frio de
+# um servidor) e de um segundo run no mesmo processo (a troca de página, com os
+# módulos já carregados). Os dados vêm dos stand-ins de bench/stubs.py; com
+# --pacote, o pacote de core/snapshot.py é gravado antes e as páginas rodam
+# offline, só com ele. Exemplo (a partir de TCC/):
+#
+#     python -m bench.partida --repeticoes 5
+#     python -m bench.partida --pacote --paginas App.py
+import argparse
+import ast
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINAS = [
+    "App.py",
+    "pages/Dados governo.py",
+    "pages/Parcelas e juros.py",
+    "pages/Simulador de investimento.py",
+]
+# Módulos pesados cuja presença depois da primeira renderização vale mostrar.
+PESADOS = ["requests", "plotly.express", "pyarrow", "plotly.validators"]
+
+
+def _importacoes(pagina):
+    # Só os imports do topo do script, na ordem em que aparecem.
+    with open(os.path.join(RAIZ, pagina), encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+    return ast.Module([n for n in arvore.body if isinstance(n, (ast.Import, ast.ImportFrom))], type_ignores=[])
+
+
+def filho(pagina, timeout):
+    # Roda dentro do processo novo; imprime uma linha JSON com os tempos.
+    inicio = time.perf_counter()
+    import streamlit  # noqa: F401
+    from streamlit.testing.v1 import AppTest
+
+    t_streamlit = time.perf_counter() - inicio
+
+    sys.path.insert(0, RAIZ)
+    inicio = time.perf_counter()
+    exec(compile(_importacoes(pagina), pagina, "exec"), {"__name__": "__partida__"})
+    t_imports = time.perf_counter() - inicio
+
+    at = AppTest.from_file(os.path.join(RAIZ, pagina), default_timeout=timeout)
+    inicio = time.perf_counter()
+    at.run()
+    t_primeira = time.perf_counter() - inicio
+    erros = len(at.exception)
+
+    inicio = time.perf_counter()
+    at.run()
+    t_segunda = time.perf_counter() - inicio
+
+    print(json.dumps({
+        "streamlit": t_streamlit,
+        "imports": t_imports,
+        "primeira": t_primeira,
+        "segunda": t_segunda,
+        "erros": erros + len(at.exception),
+        "modulos": len(sys.modules),
+        "pesados": [m for m in PESADOS if m in sys.modules],
+    }))
+
+
+def medir(pagina, repeticoes, timeout, env):
+    execucoes = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-m", "bench.partida", "--filho", pagina, "--timeout", str(timeout)],
+            cwd=RAIZ, env=env, capture_output=True, text=True,
+        )
+        linhas = [l for l in saida.stdout.splitlines() if l.startswith("{")]
+        if saida.returncode or not linhas:
+            print(f"[{pagina}] falhou:\n{saida.stderr[-2000:]}", file=sys.stderr)
+            continue
+        execucoes.append(json.loads(linhas[-1]))
+    if not execucoes:
+        return {"Página": pagina, "Erros": repeticoes}
+
+    def mediana(campo):
+        return float(np.median([e[campo] for e in execucoes])) * 1000
+
+    return {
+        "Página": pagina,
+        "Import streamlit (ms)": mediana("streamlit"),
+        "Imports da página (ms)": mediana("imports"),
+        "Primeira renderização (ms)": mediana("primeira"),
+        "Partida a frio (ms)": mediana("imports") + mediana("primeira"),
+        "Troca de página (ms)": mediana("segunda"),
+        "Módulos": int(np.median([e["modulos"] for e in execucoes])),
+        "Pesados carregados": ", ".join(execucoes[-1]["pesados"]) or "-",
+        "Erros": sum(e["erros"] for e in execucoes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de partida e de primeira renderização por página.")
+    parser.add_argument("--paginas", nargs="*", default=PAGINAS, choices=PAGINAS)
+    parser.add_argument("--repeticoes", type=int, default=3, help="processos novos por página (vale a mediana)")
+    parser.add_argument("--latencia", type=float, default=0.05, help="atraso médio dos stand-ins (s)")
+    parser.add_argument("--pacote", action="store_true", help="grava um pacote e roda as páginas offline com ele")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", default=None, help="grava os resultados neste arquivo")
+    parser.add_argument("--filho", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        filho(args.filho, args.timeout)
+        return
+
+    sys.path.insert(0, RAIZ)
+    from bench.stubs import iniciar
+
+    brapi, sgs = iniciar(args.latencia)
+    dados = tempfile.mkdtemp(prefix="smooth-partida-")
+    env = dict(os.environ, BRAPI_BASE_URL=brapi.url, BCB_BASE_URL=sgs.url, SMOOTH_DATA_DIR=dados)
+    for var in ("SGS_DB_PATH", "HISTORY_DB_PATH", "SMOOTH_SNAPSHOT_DIR", "SMOOTH_OFFLINE"):
+        env.pop(var, None)
+
+    try:
+        if args.pacote:
+            subprocess.run([sys.executable, "-m", "core.snapshot"], cwd=RAIZ, env=env, check=True)
+            # Só o pacote: sem os SQLite que o comando deixou, e sem rede.
+            for nome in os.listdir(dados):
+                if nome.endswith(".sqlite"):
+                    os.remove(os.path.join(dados, nome))
+            env["SMOOTH_OFFLINE"] = "1"
+        else:
+            # Aquece os stores locais para medir a partida, não o primeiro download.
+            for pagina in args.paginas:
+                subprocess.run(
+                    [sys.executable, "-m", "bench.partida", "--filho", pagina, "--timeout", str(args.timeout)],
+                    cwd=RAIZ, env=env, capture_output=True,
+                )
+        linhas = [medir(p, args.repeticoes, args.timeout, env) for p in args.paginas]
+    finally:
+        brapi.stop()
+        sgs.stop()
+        shutil.rmtree(dados, ignore_errors=True)
+
+    with pd.option_context("display.width", 250, "display.max_columns", None):
+        print(pd.DataFrame(linhas).round(1).to_string(index=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(linhas, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# Servidores locais que substituem a Brapi e o SGS do Banco Central.
+#
+# Respondem a partir das gravações em bench/gravacoes (ou de séries sintéticas
+# determinísticas, quando não há gravação), com latência e taxa de erro
+# configuráveis. Para apontar o app para eles (a partir de TCC/):
+#
+#     python -m bench.stubs --latencia 0.08 --erros 0.02
+#
+# e exporte as variáveis BRAPI_BASE_URL e BCB_BASE_URL impressas na saída.
+# "python -m bench.stubs --gravar" baixa respostas reais para bench/gravacoes.
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import requests
+
+GRAVACOES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gravacoes")
+
+SGS_URL = "https://api.bcb.gov.br/dados/serie"
+BRAPI_URL = "https://brapi.dev/api"
+
+
+def _caminho(nome):
+    return os.path.join(GRAVACOES, f"{nome}.json")
+
+
+def _carregar(nome):
+    try:
+        with open(_caminho(nome), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def gravar(codigos=(), tickers=(), anos=10, token=None):
+    # Baixa respostas reais uma vez; depois os stand-ins só as reproduzem.
+    os.makedirs(GRAVACOES, exist_ok=True)
+    hoje = date.today()
+    for codigo in codigos:
+        dados = []
+        inicio = hoje - timedelta(days=anos * 365)
+        while inicio <= hoje:
+            fim = min(inicio + timedelta(days=365 * 10 - 1), hoje)
+            resposta = requests.get(
+                f"{SGS_URL}/bcdata.sgs.{int(codigo)}/dados",
+                params={"formato": "json", "dataInicial": inicio.strftime("%d/%m/%Y"),
+                        "dataFinal": fim.strftime("%d/%m/%Y")},
+                timeout=30,
+            )
+            if resposta.status_code != 404:
+                resposta.raise_for_status()
+                dados.extend(resposta.json())
+            inicio = fim + timedelta(days=1)
+        with open(_caminho(f"sgs_{int(codigo)}"), "w", encoding="utf-8") as f:
+            json.dump(dados, f)
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    for ticker in tickers:
+        resposta = requests.get(
+            f"{BRAPI_URL}/quote/{ticker.upper()}",
+            params={"range": "max", "interval": "1d"},
+            headers=headers,
+            timeout=30,
+        )
+        resposta.raise_for_status()
+        with open(_caminho(f"brapi_{ticker.upper()}"), "w", encoding="utf-8") as f:
+            json.dump(resposta.json()["results"][0], f)
+
+
+def _semente(texto):
+    return sum(ord(c) * 31 ** i for i, c in enumerate(texto)) % 2 ** 32
+
+
+def sgs_sintetica(codigo, inicio, fim):
+    # Onda suave em dias úteis: sempre o mesmo valor para o mesmo código e data.
+    dias = np.arange(np.datetime64(inicio), np.datetime64(fim) + 1, dtype="datetime64[D]")
+    dias = dias[np.is_busday(dias)]
+    ordinais = (dias - np.datetime64("1970-01-01")).astype(np.int64)
+    ruido = np.sin(ordinais * 0.013 + codigo) + 0.3 * np.sin(ordinais * 0.11 + 2 * codigo)
+    valores = 5 + 2 * ruido if codigo not in (11, 12) else 0.03 + 0.005 * ruido
+    return [
+        {"data": datetime.fromisoformat(str(d)).strftime("%d/%m/%Y"), "valor": f"{v:.6f}"}
+        for d, v in zip(dias, valores)
+    ]
+
+
+def brapi_sintetica(ticker, dias=3653):
+    rng = np.random.default_rng(_semente(ticker))
+    hoje = date.today()
+    datas = [hoje - timedelta(days=d) for d in range(dias, -1, -1)]
+    datas = [d for d in datas if d.weekday() < 5]
+    fechamento = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.018, len(datas))))
+    historico = [
+        {
+            "date": int(datetime(d.year, d.month, d.day).timestamp()),
+            "open": float(c * 0.995), "high": float(c * 1.01), "low": float(c * 0.99),
+            "close": float(c), "volume": int(1e6), "adjustedClose": float(c),
+        }
+        for d, c in zip(datas, fechamento)
+    ]
+    ultimo = historico[-1]["close"]
+    return {
+        "symbol": ticker,
+        "longName": f"{ticker} S.A.",
+        "regularMarketPrice": ultimo,
+        "regularMarketChangePercent": float(fechamento[-1] / fechamento[-2] * 100 - 100),
+        "regularMarketVolume": int(1e6),
+        "regularMarketDayHigh": ultimo * 1.01,
+        "regularMarketDayLow": ultimo * 0.99,
+        "regularMarketTime": int(time.time()),
+        "historicalDataPrice": historico,
+    }
+
+
+class Replay:
+    def __init__(self):
+        self._sgs = {}
+        self._brapi = {}
+        self._lock = threading.Lock()
+
+    def sgs(self, codigo, inicio, fim):
+        with self._lock:
+            if codigo not in self._sgs:
+                gravado = _carregar(f"sgs_{codigo}")
+                if gravado is not None:
+                    datas = np.array(
+                        [datetime.strptime(o["data"], "%d/%m/%Y").date() for o in gravado], dtype="datetime64[D]"
+                    )
+                    self._sgs[codigo] = (datas, gravado)
+                else:
+                    self._sgs[codigo] = None
+            serie = self._sgs[codigo]
+        if serie is None:
+            return sgs_sintetica(codigo, inicio, fim)
+        datas, obs = serie
+        ini = np.searchsorted(datas, np.datetime64(inicio), side="left")
+        fim_ = np.searchsorted(datas, np.datetime64(fim), side="right")
+        return obs[ini:fim_]
+
+    def cotacao(self, ticker, range_=None):
+        with self._lock:
+            if ticker not in self._brapi:
+                self._brapi[ticker] = _carregar(f"brapi_{ticker}") or brapi_sintetica(ticker)
+            gravado = self._brapi[ticker]
+        cotacao = {k: v for k, v in gravado.items() if k != "historicalDataPrice"}
+        if range_:
+            dias = {"5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366,
+                    "2y": 731, "5y": 1827, "10y": 3653}.get(range_)
+            historico = gravado.get("historicalDataPrice", [])
+            if dias is not None:
+                corte = time.time() - dias * 86400
+                historico = [b for b in historico if b["date"] >= corte]
+            cotacao["historicalDataPrice"] = historico
+        return cotacao
+
+
+class StubServer:
+    def __init__(self, latencia=0.0, jitter=0.0, erros=0.0, semente=None, replay=None, porta=0):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.erros = erros
+        self.replay = replay or Replay()
+        self.chamadas = Counter()
+        self._rng = random.Random(semente)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", porta), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def total(self):
+        with self._lock:
+            return sum(self.chamadas.values())
+
+    def _sortear(self):
+        with self._lock:
+            atraso = max(self._rng.gauss(self.latencia, self.jitter), 0.0) if self.jitter else self.latencia
+            falha = self._rng.random() < self.erros
+        return atraso, falha
+
+    def _contar(self, rota):
+        with self._lock:
+            self.chamadas[rota] += 1
+
+    def responder(self, caminho, params):
+        # Devolve (status, corpo); as subclasses sabem ler cada API.
+        raise NotImplementedError
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(partes.query).items()}
+                atraso, falha = stub._sortear()
+                time.sleep(atraso)
+                if falha:
+                    stub._contar("erro")
+                    self.send_response(503)
+                    self.send_header("Retry-After", "1")
+                    self.end_headers()
+                    return
+                status, corpo = stub.responder(partes.path, params)
+                dados = json.dumps(corpo).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SGSStub(StubServer):
+    def responder(self, caminho, params):
+        # /bcdata.sgs.{codigo}/dados?dataInicial=dd/mm/aaaa&dataFinal=dd/mm/aaaa
+        codigo = int(caminho.strip("/").split("/")[0].rsplit(".", 1)[1])
+        self._contar(f"sgs.{codigo}")
+        inicio = datetime.strptime(params["dataInicial"], "%d/%m/%Y").date()
+        fim = datetime.strptime(params.get("dataFinal", date.today().strftime("%d/%m/%Y")), "%d/%m/%Y").date()
+        dados = self.replay.sgs(codigo, inicio, fim)
+        if not dados:
+            return 404, {"error": "Nenhum dado encontrado"}
+        return 200, dados
+
+
+class BrapiStub(StubServer):
+    # Como a Brapi: um ticker inexistente derruba a requisição inteira com 404.
+    desconhecidos = frozenset()
+
+    def responder(self, caminho, params):
+        # /quote/{ticker1,ticker2}?range=1mo&interval=1d
+        tickers = [t.upper() for t in caminho.rsplit("/", 1)[1].split(",") if t]
+        self._contar("historico" if "range" in params else "cotacao")
+        if self.desconhecidos & set(tickers):
+            return 404, {"error": True, "message": "Não encontramos a ação"}
+        return 200, {"results": [self.replay.cotacao(t, params.get("range")) for t in tickers]}
+
+
+def iniciar(latencia=0.0, jitter=0.0, erros=0.0, semente=None, portas=(0, 0)):
+    brapi = BrapiStub(latencia, jitter, erros, semente, porta=portas[0]).start()
+    sgs = SGSStub(latencia, jitter, erros, semente, porta=portas[1]).start()
+    return brapi, sgs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-ins locais da Brapi e do SGS.")
+    parser.add_argument("--latencia", type=float, default=0.0, help="atraso médio por resposta (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="desvio-padrão do atraso (s)")
+    parser.add_argument("--erros", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--semente", type=int, default=None)
+    parser.add_argument("--porta-brapi", type=int, default=8701)
+    parser.add_argument("--porta-sgs", type=int, default=8702)
+    parser.add_argument("--gravar", action="store_true", help="grava respostas reais em vez de servir")
+    parser.add_argument("--sgs", type=int, nargs="*", default=[1178, 4389, 433, 1, 11, 12])
+    parser.add_argument("--tickers", nargs="*", default=["PETR4", "VALE3", "ITUB4", "MXRF11", "BBAS3"])
+    parser.add_argument("--anos", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.gravar:
+        gravar(args.sgs, args.tickers, args.anos, os.environ.get("BRAPI_TOKEN"))
+        return
+
+    brapi, sgs = iniciar(args.latencia, args.jitter, args.erros, args.semente, (args.porta_brapi, args.porta_sgs))
+    print(f"export BRAPI_BASE_URL={brapi.url}")
+    print(f"export BCB_BASE_URL={sgs.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        brapi.stop()
+        sgs.stop()
+
+if __name__ == "__main__":
+    main()
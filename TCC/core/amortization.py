@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Mês", "Saldo Inicial", "Juros", "Amortização", "Amortização Extra",
+    "Parcela", "Saldo Final", "Juros Acumulados", "Amortização Acumulada", "Total Pago",
+]
+
+
+def pmt(pv, rate, n, due=False):
+    if rate == 0:
+        return pv / n
+    factor = (1 + rate) ** n
+    payment = pv * (rate * factor) / (factor - 1)
+    return payment / (1 + rate) if due else payment
+
+
+def _extras(prepayments, n):
+    extras = np.zeros(n)
+    for month, value in (prepayments or {}).items():
+        if 1 <= month <= n:
+            extras[month - 1] += value
+    return extras
+
+
+def _last_month(closing, pv):
+    # Pré-pagamentos reduzem o prazo: o cronograma termina no primeiro mês em
+    # que o saldo zera, e a última amortização fica limitada ao saldo restante.
+    paid_off = np.flatnonzero(closing <= pv * 1e-9)
+    return paid_off[0] + 1 if len(paid_off) else len(closing)
+
+
+def price_schedule(pv, rate, n, due=False, prepayments=None):
+    payment = pmt(pv, rate, n, due)
+    extras = _extras(prepayments, n)
+
+    # Saldo após o pagamento t: b_t = G_t (PV - sum_{j<=t} p_j / G_j), onde G_t é o
+    # fator acumulado de juros. No antecipado o primeiro pagamento não tem juros.
+    factors = np.full(n, 1 + rate)
+    if due:
+        factors[0] = 1.0
+    growth = np.cumprod(factors)
+    closing = growth * (pv - np.cumsum((payment + extras) / growth))
+
+    last = _last_month(closing, pv)
+    factors, extras, closing = factors[:last], extras[:last], closing[:last]
+    opening = np.concatenate([[pv], closing[:-1]])
+    closing = np.maximum(closing, 0.0)
+
+    interest = opening * (factors - 1)
+    principal = opening - closing
+    scheduled = np.minimum(payment - interest, principal)
+    return _frame(opening, interest, scheduled, principal - scheduled, closing)
+
+
+def sac_schedule(pv, rate, n, prepayments=None):
+    extras = _extras(prepayments, n)
+    base = pv / n
+
+    closing = pv - np.cumsum(base + extras)
+    last = _last_month(closing, pv)
+    closing = np.maximum(closing[:last], 0.0)
+    opening = np.concatenate([[pv], closing[:-1]])
+
+    interest = opening * rate
+    principal = opening - closing
+    scheduled = np.minimum(base, principal)
+    return _frame(opening, interest, scheduled, principal - scheduled, closing)
+
+
+def _frame(opening, interest, scheduled, extra, closing):
+    installment = interest + scheduled
+    return pd.DataFrame({
+        "Mês": np.arange(1, len(opening) + 1),
+        "Saldo Inicial": opening,
+        "Juros": interest,
+        "Amortização": scheduled,
+        "Amortização Extra": extra,
+        "Parcela": installment,
+        "Saldo Final": closing,
+        "Juros Acumulados": np.cumsum(interest),
+        "Amortização Acumulada": np.cumsum(scheduled + extra),
+        "Total Pago": np.cumsum(installment + extra),
+    }, columns=COLUMNS)
@@ -0,0 +1,121 @@
+import io
+import os
+import threading
+import zlib
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from core.snapshot import SNAPSHOT_DIR, atual
+
+BANCOS_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bancos_investimentos.csv")
+METRICS = ["Renda Fixa", "Ações", "FIIs", "Câmbio", "COE", "Crédito"]
+NGRAM = 3
+
+
+def _ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class BankData:
+    def __init__(self, rows, version=None):
+        self.rows = rows
+        self.version = version
+        by_bank = rows.groupby("Banco", sort=False)[METRICS].sum()
+        by_bank["Total"] = by_bank[METRICS].sum(axis=1)
+        self.by_bank = by_bank.reset_index()
+
+        self.class_totals = self.by_bank[METRICS].sum()
+        self.total = float(self.class_totals.sum())
+        self.mean_total = float(self.by_bank["Total"].mean()) if len(self.by_bank) else 0.0
+
+        self._names = [name.casefold() for name in self.by_bank["Banco"].astype(str)]
+        index = {}
+        for row, name in enumerate(self._names):
+            for n in range(1, NGRAM + 1):
+                for gram in _ngrams(name, n):
+                    index.setdefault(gram, []).append(row)
+        self._index = {gram: np.array(rows_, dtype=np.int64) for gram, rows_ in index.items()}
+
+        # O snapshot é imutável, então os resultados podem ser compartilhados.
+        self.search = lru_cache(maxsize=512)(self._search)
+
+    def _candidates(self, query):
+        n = min(len(query), NGRAM)
+        rows = None
+        for gram in _ngrams(query, n):
+            hits = self._index.get(gram)
+            if hits is None:
+                return np.array([], dtype=np.int64)
+            rows = hits if rows is None else np.intersect1d(rows, hits, assume_unique=True)
+        return rows
+
+    def _search(self, query):
+        query = query.strip().casefold()
+        if not query:
+            return self.by_bank
+        rows = self._candidates(query)
+        if len(query) > NGRAM:
+            rows = [r for r in rows if query in self._names[r]]
+        return self.by_bank.iloc[rows]
+
+
+class BankStore:
+    def __init__(self, path=BANCOS_CSV, snapshot_dir=SNAPSHOT_DIR):
+        self.path = path
+        self.snapshot_dir = snapshot_dir
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._offset = 0
+        self._check = None
+        self._header = b""
+        self.data = None
+
+    def _tail_check(self, raw):
+        return zlib.crc32(raw[-4096:])
+
+    def _parse(self, header, body):
+        return pd.read_csv(io.BytesIO(header + body))
+
+    def _full_reload(self):
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        self._header = raw[:raw.find(b"\n") + 1]
+        self._offset = len(raw)
+        self._check = self._tail_check(raw)
+        # O pacote guarda as linhas já lidas; vale enquanto o CSV for o mesmo.
+        snapshot = atual(self.snapshot_dir) if self.snapshot_dir else None
+        rows = snapshot.bancos(zlib.crc32(raw)) if snapshot else None
+        return rows if rows is not None else self._parse(b"", raw)
+
+    def _append_reload(self):
+        # Lê só as linhas novas quando o arquivo cresceu sem mudar o que já foi lido.
+        with open(self.path, "rb") as f:
+            f.seek(max(self._offset - 4096, 0))
+            before = f.read(min(self._offset, 4096))
+            if zlib.crc32(before) != self._check:
+                return None
+            tail = f.read()
+        self._offset += len(tail)
+        self._check = self._tail_check(before + tail)
+        new_rows = self._parse(self._header, b"\n" + tail)
+        return pd.concat([self.data.rows, new_rows], ignore_index=True)
+
+    def current(self):
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return self.data
+
+        with self._lock:
+            if stamp != self._stamp:
+                rows = None
+                if self.data is not None and st.st_size > self._offset:
+                    rows = self._append_reload()
+                if rows is None:
+                    rows = self._full_reload()
+                rows[METRICS] = rows[METRICS].fillna(0)
+                self.data = BankData(rows, version=stamp)
+                self._stamp = stamp
+        return self.data
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+
+from core import fetch
+from core.fetch import default_fetcher
+from core.perf import COUNTERS
+from core.snapshot import OFFLINE, SNAPSHOT_DIR, atual
+
+BASE_URL = os.environ.get("BRAPI_BASE_URL", "https://brapi.dev/api")
+TOKEN = os.environ.get("BRAPI_TOKEN", "3GESW9TDeo7A1Jy2T5s1v8")
+
+
+# Símbolos por requisição no refresh, e por quantos ttl um símbolo que ninguém
+# pediu continua sendo atualizado em segundo plano.
+REFRESH_BATCH = 10
+WATCH_TTLS = 10
+
+LIVE_FIELDS = ("regularMarketPrice", "regularMarketChangePercent", "regularMarketVolume", "regularMarketTime")
+
+
+def _changed(old, new):
+    return any(old.get(field) != new.get(field) for field in LIVE_FIELDS)
+
+
+class QuoteClient:
+    def __init__(self, token=TOKEN, ttl=60, max_batch=None, fetcher=None, snapshot_dir=SNAPSHOT_DIR, offline=OFFLINE,
+                 watch_ttls=WATCH_TTLS):
+        self.ttl = ttl
+        self.max_batch = max_batch
+        self.watch_ttls = watch_ttls
+        self._fetcher = fetcher
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.offline = offline
+
+        self._cache = {}
+        self._versions = {}
+        self.version = 0
+        # Símbolo -> último pedido; só entra depois de voltar em "results".
+        self._watched = {}
+        self._lock = threading.Lock()
+        self._refresher = None
+
+        # As cotações do pacote valem como recém-buscadas: a primeira tela não
+        # espera a rede e o refresh em segundo plano as substitui em até ttl/2.
+        snapshot = atual(snapshot_dir) if snapshot_dir else None
+        if snapshot is not None:
+            now = time.monotonic()
+            for quote in snapshot.cotacoes():
+                self._cache[quote["symbol"].upper()] = (now, quote)
+
+    @property
+    def fetcher(self):
+        return self._fetcher or default_fetcher()
+
+    def _batches(self, tickers, size=None):
+        size = size or self.max_batch or len(tickers)
+        for start in range(0, len(tickers), size):
+            yield tickers[start:start + size]
+
+    def _fetch_batch(self, batch):
+        url = f"{BASE_URL}/quote/{','.join(batch)}"
+        data = self.fetcher.get_json(url, headers=self.headers)
+        now = time.monotonic()
+        with self._lock:
+            for quote in data.get("results", []):
+                symbol = quote["symbol"].upper()
+                old = self._cache.get(symbol)
+                if old is None or _changed(old[1], quote):
+                    self.version += 1
+                    self._versions[symbol] = self.version
+                self._cache[symbol] = (now, quote)
+
+    def _fetch(self, tickers, size=None):
+        # Lotes independentes: um lote que falha é refeito símbolo a símbolo, e
+        # um símbolo com erro (deslistado, por exemplo) não leva os outros junto.
+        # Devolve os erros, um por símbolo que ficou sem cotação.
+        errors = []
+        for batch in self._batches(tickers, size):
+            try:
+                self._fetch_batch(batch)
+            except fetch.RequestException as e:
+                if len(batch) == 1:
+                    errors.append(e)
+                    continue
+                for symbol in batch:
+                    try:
+                        self._fetch_batch([symbol])
+                    except fetch.RequestException as e:
+                        errors.append(e)
+        return errors
+
+    def _stale(self, tickers, now):
+        return [
+            t for t in tickers
+            if t not in self._cache or now - self._cache[t][0] > self.ttl
+        ]
+
+    def get_quotes(self, tickers):
+        tickers = [t.strip().upper() for t in tickers if t.strip()]
+        with self._lock:
+            missing = self._stale(tickers, time.monotonic())
+        COUNTERS.incr("quote_misses", "brapi", len(missing))
+        COUNTERS.incr("quote_hits", "brapi", len(tickers) - len(missing))
+        errors = self._fetch(missing) if missing and not self.offline else []
+        if errors:
+            COUNTERS.incr("quote_errors", "brapi", len(errors))
+        now = time.monotonic()
+        with self._lock:
+            found = [t for t in tickers if t in self._cache]
+            self._watched.update(dict.fromkeys(found, now))
+            quotes = [self._cache[t][1] for t in found]
+        # Só é erro se nada voltou: o resto da tabela vale sem o símbolo que falhou.
+        if errors and not quotes:
+            raise errors[0]
+        return quotes
+
+    def changed_since(self, version, tickers=None):
+        with self._lock:
+            symbols = self._versions if tickers is None else [t.upper() for t in tickers]
+            return {t for t in symbols if self._versions.get(t, 0) > version}
+
+    def get_history(self, ticker, range_="1mo", interval="1d"):
+        # Quem chama (HistoryStore) grava as barras no SQLite; não há por que
+        # guardar o corpo também no cache do Fetcher.
+        url = f"{BASE_URL}/quote/{ticker.upper()}"
+        params = {"range": range_, "interval": interval}
+        results = self.fetcher.get_json(url, params=params, headers=self.headers, cache=False).get("results", [])
+        return results[0].get("historicalDataPrice", []) if results else []
+
+    def refresh(self):
+        if self.offline:
+            return
+        now = time.monotonic()
+        with self._lock:
+            expired = [t for t, last in self._watched.items() if now - last > self.watch_ttls * self.ttl]
+            for t in expired:
+                del self._watched[t]
+            due = self._stale(sorted(self._watched), now + self.ttl * 0.2)
+        errors = self._fetch(due, self.max_batch or REFRESH_BATCH)
+        if errors:
+            COUNTERS.incr("quote_refresh_errors", "brapi", len(errors))
+        if errors and len(errors) == len(due):
+            raise errors[0]
+
+    def _refresh_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except fetch.RequestException:
+                # Mantém as cotações antigas; a próxima volta tenta de novo.
+                pass
+
+    def start_refresh(self, interval=None):
+        if self._refresher is None:
+            self._refresher = threading.Thread(
+                target=self._refresh_loop,
+                args=(interval or max(self.ttl / 2, 1),),
+                name="brapi-refresh",
+                daemon=True,
+            )
+            self._refresher.start()
+        return self
@@ -0,0 +1,48 @@
+import numpy as np
+import plotly.graph_objects as go
+
+# Um gráfico de ~1000 px de largura não mostra mais que dois pontos por pixel.
+MAX_POINTS = 2000
+WEBGL_THRESHOLD = 1000
+MARKERS_THRESHOLD = 200
+
+
+def downsample(x, y, max_points=MAX_POINTS):
+    # Min/max por bucket: mantém picos e vales, que são o que o olho percebe.
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return x, y
+
+    buckets = max_points // 2
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(rows), np.inf, rows), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(rows), -np.inf, rows), axis=1)
+
+    idx = np.unique(np.concatenate([[0, n - 1], lows, highs]))
+    idx = idx[idx < n]
+    return x[idx], y[idx]
+
+
+def line_figure(x, columns, max_points=MAX_POINTS, colors=None):
+    fig = go.Figure()
+    x = np.asarray(x)
+    for i, (name, y) in enumerate(columns.items()):
+        y = np.asarray(y, dtype=float)
+        valid = ~np.isnan(y)
+        px_, py_ = downsample(x[valid], y[valid], max_points)
+
+        trace = go.Scattergl if valid.sum() > WEBGL_THRESHOLD else go.Scatter
+        fig.add_trace(trace(
+            x=px_,
+            y=py_,
+            name=name,
+            mode="lines+markers" if len(py_) <= MARKERS_THRESHOLD else "lines",
+            line=dict(color=colors[i]) if colors else None,
+        ))
+    return fig
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from core import memo
+from core.perf import COUNTERS, LATENCY, cache_stats, prometheus_text, span
+
+# Se definido, o texto no formato do Prometheus é regravado ao fim de cada execução.
+METRICS_PATH = os.environ.get("PERF_METRICS_PATH")
+
+
+def debug_ativo():
+    return st.query_params.get("debug") == "1"
+
+
+def mostrar_grafico(nome, fig):
+    with span("render", nome):
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def _tabela(linhas, vazio):
+    df = pd.DataFrame(linhas)
+    if df.empty:
+        st.caption(vazio)
+    else:
+        st.dataframe(df.round(1), hide_index=True, use_container_width=True)
+
+
+@st.fragment
+def _tabela_latencia():
+    st.button("Atualizar", key="debug_atualizar")
+
+    st.subheader("Latência por seção")
+    _tabela(LATENCY.summary(), "Nenhuma medição ainda.")
+
+    st.subheader("Caches")
+    _tabela(cache_stats(), "Nenhum cache consultado ainda.")
+
+    st.subheader("Resultados memorizados")
+    _tabela(memo.memo_stats(), "Nenhum cálculo memorizado ainda.")
+
+    st.subheader("Chamadas e contadores")
+    contadores = [c for c in COUNTERS.summary() if not c["Contador"].startswith("cache_")]
+    _tabela(contadores, "Nenhuma chamada externa ainda.")
+
+    st.download_button(
+        "Baixar métricas (Prometheus)",
+        prometheus_text() + memo.prometheus_text(),
+        file_name="metricas.prom",
+        mime="text/plain",
+        key="debug_prometheus",
+    )
+
+
+def painel_latencia():
+    # Ative com ?debug=1 na URL.
+    if not debug_ativo():
+        return
+    with st.sidebar:
+        _tabela_latencia()
+
+
+def _gravar_metricas(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text() + memo.prometheus_text())
+    os.replace(tmp, path)
+
+
+def fim_da_execucao(pagina, inicio):
+    LATENCY.record(f"{pagina} — página inteira", time.perf_counter() - inicio)
+    if METRICS_PATH:
+        _gravar_metricas(METRICS_PATH)
+    painel_latencia()
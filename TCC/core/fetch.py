@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlsplit
+
+from core.perf import COUNTERS, span
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Requisições por segundo e rajada máxima por host.
+HOST_LIMITS = {
+    "brapi.dev": (5.0, 10),
+    "api.bcb.gov.br": (10.0, 20),
+}
+DEFAULT_LIMIT = (10.0, 20)
+
+# requests só é importado quando o primeiro Fetcher é criado; quem só precisa
+# das exceções usa `fetch.RequestException` etc., resolvidos sob demanda.
+_EXCECOES = {"RequestException", "HTTPError", "ConnectionError", "Timeout"}
+
+
+def __getattr__(nome):
+    if nome in _EXCECOES:
+        import requests
+
+        return getattr(requests, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Fetcher:
+    def __init__(self, timeout=10, retries=3, backoff=0.5, max_backoff=8.0,
+                 soft_timeout=2.0, workers=16, limits=None, max_entries=1024, max_bytes=16 * 1024 ** 2):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.soft_timeout = soft_timeout
+        self.limits = dict(HOST_LIMITS, **(limits or {}))
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch")
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._inflight = {}
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+
+    def _bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(*self.limits.get(host, DEFAULT_LIMIT))
+            return self._buckets[host]
+
+    def _delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        # Backoff exponencial com jitter completo, para sessões não baterem juntas.
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _request(self, url, params, headers):
+        import requests
+
+        host = urlsplit(url).hostname
+        bucket = self._bucket(host)
+        for attempt in range(self.retries + 1):
+            bucket.acquire()
+            response = None
+            COUNTERS.incr("upstream_calls", host)
+            if attempt:
+                COUNTERS.incr("upstream_retries", host)
+            try:
+                with span("fetch", host):
+                    response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json(), len(response.content)
+                error = requests.HTTPError(f"{response.status_code} para {url}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if attempt == self.retries:
+                COUNTERS.incr("upstream_errors", host)
+                raise error
+            time.sleep(self._delay(attempt, response))
+
+    def _run(self, key, url, params, headers, cache):
+        try:
+            data, size = self._request(url, params, headers)
+            if cache and size <= self.max_bytes:
+                with self._lock:
+                    old = self._cache.pop(key, None)
+                    self._cache_bytes += size - (old[2] if old else 0)
+                    self._cache[key] = (time.monotonic(), data, size)
+                    # Limite em bytes do corpo, não só em entradas.
+                    while len(self._cache) > self.max_entries or self._cache_bytes > self.max_bytes:
+                        self._cache_bytes -= self._cache.popitem(last=False)[1][2]
+            return data
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_json(self, url, params=None, headers=None, ttl=0, stale_ttl=600, cache=True):
+        # cache=False: a resposta não fica guardada (nem como cópia de reserva);
+        # para dados que já vão para um store local.
+        import requests
+
+        key = (url, tuple(sorted((params or {}).items())), tuple(sorted((headers or {}).items())))
+        host = urlsplit(url).hostname
+        now = time.monotonic()
+
+        with self._lock:
+            cached = self._cache.get(key) if cache else None
+            if cached and now - cached[0] < ttl:
+                COUNTERS.incr("fetch_cache_hits", host)
+                return cached[1]
+            # Single-flight: chamadas idênticas simultâneas esperam a mesma requisição.
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(self._run, key, url, params, headers, cache)
+                self._inflight[key] = future
+            else:
+                COUNTERS.incr("fetch_coalesced", host)
+
+        usable = cached if cached and now - cached[0] < stale_ttl else None
+        try:
+            return future.result(timeout=self.soft_timeout if usable else None)
+        except FutureTimeout:
+            # Upstream lento: devolve a cópia anterior e deixa a requisição terminar em segundo plano.
+            COUNTERS.incr("fetch_stale", host)
+            return usable[1]
+        except requests.RequestException:
+            if usable:
+                COUNTERS.incr("fetch_stale", host)
+                return usable[1]
+            raise
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Fetcher()
+        return _default
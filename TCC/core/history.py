@@ -0,0 +1,212 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pandas as pd
+
+from core import fetch
+from core.perf import COUNTERS
+from core.snapshot import OFFLINE, SNAPSHOT_DIR
+from core.storage import DATA_DIR, StoreLocal
+
+DB_PATH = os.environ.get("HISTORY_DB_PATH", os.path.join(DATA_DIR, "historico.sqlite"))
+COLUMNS = ["date", "open", "high", "low", "close", "volume", "adjustedClose"]
+
+# Faixas aceitas pela Brapi e quantos dias cada uma cobre (None = todo o histórico).
+RANGES = {
+    "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366,
+    "2y": 731, "5y": 1827, "10y": 3653, "max": None,
+}
+
+
+def range_start(range_, today=None):
+    days = RANGES[range_]
+    return date.min if days is None else (today or date.today()) - timedelta(days=days)
+
+
+def covering_range(days):
+    for range_, span in RANGES.items():
+        if span is None or span >= days:
+            return range_
+
+
+def bars_frame(bars):
+    df = pd.DataFrame(bars).reindex(columns=COLUMNS)
+    df = df.dropna(subset=["date", "close"])
+    df["date"] = pd.to_datetime(df["date"], unit="s").dt.normalize()
+    return df.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+
+
+class HistoryStore(StoreLocal):
+    TABELA = "tickers"
+    CHAVE = "ticker"
+    ROTULO = "brapi.history"
+
+    def __init__(self, client, path=DB_PATH, max_age=3600, snapshot_dir=SNAPSHOT_DIR, em_fundo=False,
+                 offline=OFFLINE):
+        super().__init__(path, max_age, snapshot_dir, em_fundo, offline, "historico")
+        self.client = client
+
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS barras ("
+                " ticker TEXT NOT NULL, data TEXT NOT NULL,"
+                " open REAL, high REAL, low REAL, close REAL NOT NULL,"
+                " volume REAL, adjusted_close REAL,"
+                " PRIMARY KEY (ticker, data)) WITHOUT ROWID"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS tickers ("
+                " ticker TEXT PRIMARY KEY, inicio TEXT NOT NULL,"
+                " ultima TEXT, verificado REAL NOT NULL)"
+            )
+
+
+    def _cobertura_pacote(self, snapshot, ticker):
+        return snapshot.cobertura_barras(ticker)
+
+    def _do_snapshot(self, snapshot, ticker):
+        return snapshot.barras(ticker)
+
+    def _gravar(self, con, ticker, df):
+        con.executemany(
+            "INSERT OR REPLACE INTO barras"
+            " (ticker, data, open, high, low, close, volume, adjusted_close)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                [ticker] * len(df),
+                df["date"].dt.strftime("%Y-%m-%d"),
+                *(df[col].astype(float) for col in COLUMNS[1:]),
+            ),
+        )
+
+    def sincronizar(self, ticker, range_="1mo", forcar=False):
+        ticker = ticker.strip().upper()
+        hoje = date.today()
+        inicio = range_start(range_, hoje)
+
+        with self._trava(ticker):
+            with self._connect() as con:
+                meta = self._carregar_meta(con, ticker)
+
+            if self.offline:
+                COUNTERS.incr("store_hits" if meta else "store_misses", self.ROTULO)
+                return
+
+            coberto, ultima, verificado = meta or (None, None, 0.0)
+
+            baixar = None
+            if coberto is None or inicio < coberto:
+                # Faixa maior que a já coberta: a Brapi só aceita faixas relativas a hoje.
+                baixar, coberto = range_, inicio
+            elif forcar or time.time() - verificado > self.max_age:
+                baixar = covering_range((hoje - (ultima or coberto)).days + 1)
+
+            COUNTERS.incr("store_hits" if baixar is None else "store_misses", self.ROTULO)
+            if baixar is None:
+                return
+            df = bars_frame(self.client.get_history(ticker, range_=baixar, interval="1d"))
+            if len(df):
+                ultima = max(ultima or date.min, df["date"].iloc[-1].date())
+
+            with self._connect() as con:
+                self._gravar(con, ticker, df)
+                self._gravar_meta(con, ticker, coberto, ultima, time.time())
+
+    def _ler_sqlite(self, tickers, desde, colunas):
+        marcas = ",".join("?" * len(tickers))
+        with self._connect() as con:
+            df = pd.read_sql_query(
+                f"SELECT ticker, data AS date, {colunas} FROM barras"
+                f" WHERE ticker IN ({marcas}) AND data >= ? ORDER BY data",
+                con,
+                params=(*tickers, desde.isoformat()),
+            )
+        df["date"] = pd.to_datetime(df["date"], format="%Y-%m-%d")
+        return df
+
+    def _do_pacote(self, ticker, inicio):
+        # Barras que o pacote tem a partir de `inicio` e a data depois da qual o SQLite assume.
+        snapshot = self._snapshot()
+        cobertura = snapshot.cobertura_barras(ticker) if snapshot else None
+        if cobertura is None or not cobertura[0] <= inicio <= cobertura[1]:
+            return None, None
+        COUNTERS.incr("snapshot_hits", self.ROTULO)
+        return snapshot.barras(ticker, inicio), cobertura[1]
+
+    def ler(self, ticker, range_="1mo"):
+        ticker = ticker.strip().upper()
+        inicio = range_start(range_)
+        pacote, corte = self._do_pacote(ticker, inicio)
+        desde = inicio if corte is None else corte + timedelta(days=1)
+        df = self._ler_sqlite(
+            [ticker], desde, "open, high, low, close, volume, adjusted_close AS adjustedClose"
+        ).drop(columns="ticker")
+        if pacote is not None:
+            df = pd.concat([pacote, df], ignore_index=True) if len(df) else pacote
+        return df
+
+    def garantir(self, ticker, range_="1mo"):
+        ticker = ticker.strip().upper()
+        if not (self.em_fundo and self._atualizar_em_fundo(ticker, range_start(range_), range_=range_)):
+            self.sincronizar(ticker, range_)
+
+    def historico(self, ticker, range_="1mo"):
+        self.garantir(ticker, range_)
+        return self.ler(ticker, range_)
+
+    def fechamentos(self, tickers, range_="1y"):
+        # Fechamentos de vários tickers em formato largo (data x ticker): o que o
+        # pacote cobre sai dele, o resto numa consulta só ao SQLite.
+        tickers = [t.strip().upper() for t in tickers]
+        if not tickers:
+            return pd.DataFrame()
+        inicio = range_start(range_)
+
+        colunas, cortes = {}, {}
+        for ticker in tickers:
+            pacote, corte = self._do_pacote(ticker, inicio)
+            if pacote is not None:
+                colunas[ticker] = pacote.set_index("date")["close"]
+                cortes[ticker] = corte
+
+        fora = [t for t in tickers if t not in cortes]
+        partes = [self._ler_sqlite(fora, inicio, "close")] if fora else []
+        if cortes:
+            novos = self._ler_sqlite(list(cortes), min(cortes.values()) + timedelta(days=1), "close")
+            corte = pd.to_datetime(novos["ticker"].map(cortes))
+            partes.append(novos[novos["date"] > corte])
+        if partes:
+            df = pd.concat(partes, ignore_index=True)
+            largo = df.pivot(index="date", columns="ticker", values="close")
+            for ticker in largo.columns:
+                serie = largo[ticker].dropna()
+                colunas[ticker] = pd.concat([colunas[ticker], serie]) if ticker in colunas else serie
+
+        if not colunas:
+            return pd.DataFrame()
+        largo = pd.concat(colunas, axis=1).sort_index()
+        return largo.reindex(columns=[t for t in tickers if t in largo.columns])
+
+    def historicos(self, tickers, range_="1y", workers=16):
+        # Sincroniza em paralelo (a taxa por host fica com o Fetcher) e lê tudo de uma vez.
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+        erros = {}
+        with ThreadPoolExecutor(max_workers=max(min(len(tickers), workers), 1)) as pool:
+            futuros = {t: pool.submit(self.garantir, t, range_) for t in tickers}
+            for ticker, futuro in futuros.items():
+                try:
+                    futuro.result()
+                except (fetch.RequestException, ValueError, KeyError) as e:
+                    erros[ticker] = e
+        return self.fechamentos(tickers, range_), erros
+
+    def tickers(self):
+        with self._connect() as con:
+            return [row[0] for row in con.execute("SELECT ticker FROM tickers ORDER BY ticker")]
+
+    def cobertura(self, ticker):
+        with self._connect() as con:
+            meta = self._meta(con, ticker.strip().upper())
+        return meta[:2] if meta else None
@@ -0,0 +1,177 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from core.sgs import SERIES_AO_ANO, SERIES_AO_DIA, fator_diario
+from core.tax import ir_rate_by_days
+
+DIAS_UTEIS_ANO = 252
+
+# Feriados nacionais de data fixa (mês, dia) e o ano em que passaram a valer.
+FERIADOS_FIXOS = [
+    ((1, 1), None), ((4, 21), None), ((5, 1), None), ((9, 7), None),
+    ((10, 12), None), ((11, 2), None), ((11, 15), None), ((11, 20), 2024), ((12, 25), None),
+]
+
+
+def pascoa(ano):
+    # Algoritmo de Meeus/Jones/Butcher (calendário gregoriano).
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    mes = (h + l - 7 * m + 90) // 25
+    dia = (h + l - 7 * m + 33 * mes + 19) % 32
+    return date(ano, mes, dia)
+
+
+def feriados(ano_inicio, ano_fim):
+    dias = []
+    for ano in range(ano_inicio, ano_fim + 1):
+        for (mes, dia), desde in FERIADOS_FIXOS:
+            if desde is None or ano >= desde:
+                dias.append(date(ano, mes, dia))
+        p = pascoa(ano)
+        # Carnaval (segunda e terça), Sexta-feira Santa e Corpus Christi.
+        dias += [p - timedelta(days=48), p - timedelta(days=47), p - timedelta(days=2), p + timedelta(days=60)]
+    return np.array(sorted(set(dias)), dtype="datetime64[D]")
+
+
+@lru_cache(maxsize=1)
+def calendario(ano_inicio=1980, ano_fim=2100):
+    return np.busdaycalendar(holidays=feriados(ano_inicio, ano_fim))
+
+
+def _dias(valores):
+    return np.asarray(valores, dtype="datetime64[D]")
+
+
+def dias_uteis(inicio, fim):
+    # Dias úteis em [inicio, fim), vetorizado.
+    return np.busday_count(_dias(inicio), _dias(fim), busdaycal=calendario())
+
+
+def proximo_dia_util(datas):
+    return np.busday_offset(_dias(datas), 0, roll="forward", busdaycal=calendario())
+
+
+class IndiceAcumulado:
+    # Índice acumulado de uma taxa diária (CDI, SELIC) nos dias úteis:
+    # log_indice[k] = soma dos log-fatores dos dias anteriores ao dia k, então o
+    # fator entre duas datas é exp(log_indice[fim] - log_indice[inicio]).
+    def __init__(self, datas, fatores):
+        datas = _dias(datas)
+        fatores = np.asarray(fatores, dtype=float)
+
+        # Calendário contínuo de dias úteis; um dia sem observação repete a taxa anterior.
+        self.datas = np.arange(datas[0], datas[-1] + 1, dtype="datetime64[D]")
+        self.datas = self.datas[np.is_busday(self.datas, busdaycal=calendario())]
+        posicao = np.searchsorted(datas, self.datas, side="right") - 1
+        self.fatores = fatores[np.maximum(posicao, 0)]
+
+        self.log_indice = np.concatenate([[0.0], np.cumsum(np.log(self.fatores))])
+        self._variantes = {}
+
+    @classmethod
+    def da_serie(cls, df, codigo):
+        if codigo not in SERIES_AO_DIA | SERIES_AO_ANO:
+            raise ValueError(f"Série {codigo} não é uma taxa diária")
+        if df.empty:
+            raise ValueError(f"Série {codigo} sem observações no período")
+        return cls(df["data"].to_numpy(), fator_diario(codigo, df["valor"]))
+
+    @property
+    def inicio(self):
+        return self.datas[0]
+
+    @property
+    def fim(self):
+        # Último dia para o qual o fator é conhecido (o dia seguinte à última taxa).
+        return np.busday_offset(self.datas[-1], 1, busdaycal=calendario())
+
+    def posicao(self, datas):
+        # Dias úteis do índice anteriores à data; datas fora da cobertura são recortadas.
+        return np.searchsorted(self.datas, _dias(datas), side="left")
+
+    def _log(self, percentual, spread):
+        # Índice de "percentual% do CDI + spread ao ano", calculado uma vez por variante.
+        chave = (float(percentual), float(spread))
+        if chave not in self._variantes:
+            if chave == (1.0, 0.0):
+                return self.log_indice
+            fatores = 1 + percentual * (self.fatores - 1)
+            log = np.log(fatores) + np.log1p(spread) / DIAS_UTEIS_ANO
+            self._variantes[chave] = np.concatenate([[0.0], np.cumsum(log)])
+        return self._variantes[chave]
+
+    def _log_matriz(self, percentuais, spreads):
+        # Vários produtos de uma vez: (P, N + 1) sem passar pelo cache de variantes.
+        percentuais = np.atleast_1d(np.asarray(percentuais, dtype=float))[:, None]
+        spreads = np.atleast_1d(np.asarray(spreads, dtype=float))[:, None]
+        log = np.log(1 + percentuais * (self.fatores - 1)) + np.log1p(spreads) / DIAS_UTEIS_ANO
+        zeros = np.zeros((log.shape[0], 1))
+        return np.concatenate([zeros, np.cumsum(log, axis=1)], axis=1)
+
+    def fator(self, inicio, fim, percentual=1.0, spread=0.0):
+        # Fator acumulado entre as datas (aplicação em `inicio`, resgate em `fim`).
+        # Com `percentual`/`spread` escalares o resultado tem o formato das datas;
+        # com vetores de produtos, ganha um eixo inicial de produtos.
+        a, b = self.posicao(inicio), self.posicao(fim)
+        if np.ndim(percentual) == 0 and np.ndim(spread) == 0:
+            log = self._log(percentual, spread)
+            return np.exp(log[b] - log[a])
+        log = self._log_matriz(percentual, spread)
+        return np.exp(log[:, b] - log[:, a])
+
+    def taxa_anual(self, inicio, fim, percentual=1.0, spread=0.0):
+        du = dias_uteis(inicio, fim)
+        fator = self.fator(inicio, fim, percentual, spread)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(du > 0, fator ** (DIAS_UTEIS_ANO / np.maximum(du, 1)) - 1, 0.0)
+
+    def curva(self, percentual=1.0, spread=0.0):
+        log = self._log(percentual, spread)
+        return self.datas, np.exp(log[:-1])
+
+
+def somar_meses(datas, meses):
+    # Mesmo dia do mês `meses` à frente (ou o último dia, se o mês for mais curto).
+    datas = _dias(datas)
+    inicio_mes = datas.astype("datetime64[M]")
+    dia = (datas - inicio_mes.astype("datetime64[D]")).astype(int)
+    alvo = inicio_mes + np.asarray(meses)
+    tamanho = ((alvo + 1).astype("datetime64[D]") - alvo.astype("datetime64[D]")).astype(int)
+    return alvo.astype("datetime64[D]") + np.minimum(dia, tamanho - 1)
+
+
+def backtest_aportes(indice, inicios, meses, principal, contribution, percentual=1.0, spread=0.0):
+    # Uma janela por data de início: aporte inicial na data, aportes no fim de
+    # cada mês e resgate após `meses`, tudo rendendo pelo índice real. Cada
+    # aporte paga IR pela sua própria faixa de prazo.
+    inicios = _dias(inicios)[:, None]
+    k = np.arange(meses + 1)
+    aportes = proximo_dia_util(somar_meses(inicios, k))
+    fim = aportes[:, -1:]
+
+    valores = np.where(k == 0, principal, contribution).astype(float)
+    fatores = indice.fator(aportes, fim, percentual, spread)
+
+    bruto_lotes = valores * fatores
+    ganho = bruto_lotes - valores
+    aliquota = ir_rate_by_days((fim - aportes).astype(int))
+    ir = np.maximum(ganho, 0.0) * aliquota
+
+    bruto = bruto_lotes.sum(axis=-1)
+    return {
+        "inicio": inicios[:, 0],
+        "fim": fim[:, 0],
+        "invested": float(valores.sum()),
+        "gross": bruto,
+        "tax": ir.sum(axis=-1),
+        "net": bruto - ir.sum(axis=-1),
+        "annual_rate": indice.taxa_anual(inicios[:, 0], fim[:, 0], percentual, spread),
+    }
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ["Valor", "Parcela", "Prazo"]
+OPTIONAL_COLUMNS = {"Instituição": "", "Tarifas": 0.0, "Tarifa Mensal": 0.0}
+
+
+def _annuity(rate, n, due):
+    # Fator de valor presente e sua derivada em relação à taxa.
+    v = 1 / (1 + rate)
+    vn = v ** n
+    factor = (1 - vn) / rate
+    derivative = (n * vn * v * rate - (1 - vn)) / rate ** 2
+    if due:
+        derivative = factor + (1 + rate) * derivative
+        factor = factor * (1 + rate)
+    return factor, derivative
+
+
+def implied_rate(pv, installment, n, due=False, tol=1e-12, max_iter=100):
+    # Newton com salvaguarda de bissecção, resolvendo todas as ofertas de uma vez:
+    # a(i, n) = PV / parcela, com a(i, n) decrescente em i.
+    pv, installment, n = np.broadcast_arrays(
+        np.asarray(pv, dtype=float), np.asarray(installment, dtype=float), np.asarray(n, dtype=float)
+    )
+    target = pv / installment
+    valid = (pv > 0) & (installment > 0) & (n >= 1) & (installment * n > pv)
+    if due:
+        # A primeira parcela sai na assinatura: com uma parcela só, ou parcela
+        # maior que o valor liberado, não existe taxa.
+        valid &= (target > 1) & (n >= 2)
+
+    # a(i, n) < 1/i (postecipado) e < 1 + 1/i (antecipado), então 1/(target - 1)
+    # já fecha o intervalo quando target > 1. Senão, dobra até g mudar de sinal.
+    lo = np.full(pv.shape, 1e-12)
+    hi = np.where(target > 1, 1 / np.maximum(target - 1, 1e-12), 1.0)
+    for _ in range(64):
+        grow = valid & (_annuity(hi, n, due)[0] > target)
+        if not grow.any():
+            break
+        hi = np.where(grow, hi * 2, hi)
+    rate = np.clip(2 * (installment * n - pv) / (pv * (n + 1)), lo, hi)
+    rate = np.where(valid, rate, 0.01)
+
+    for _ in range(max_iter):
+        factor, derivative = _annuity(rate, n, due)
+        g = factor - target
+        lo = np.where(g > 0, rate, lo)
+        hi = np.where(g > 0, hi, rate)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = rate - g / derivative
+        bisect = ~np.isfinite(step) | (step <= lo) | (step >= hi)
+        new_rate = np.where(bisect, (lo + hi) / 2, step)
+
+        done = np.abs(new_rate - rate) <= tol * np.maximum(rate, 1e-6)
+        rate = new_rate
+        if done[valid].all():
+            break
+
+    rate = np.where(valid, rate, np.nan)
+    return rate if rate.ndim else float(rate)
+
+
+def annual_rate(monthly):
+    return (1 + np.asarray(monthly)) ** 12 - 1
+
+
+def compare_offers(df, due=False):
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+
+    offers = df.copy()
+    for col, default in OPTIONAL_COLUMNS.items():
+        if col not in offers.columns:
+            offers[col] = default
+    offers["Instituição"] = offers["Instituição"].fillna("").astype(str)
+    for col in REQUIRED_COLUMNS + ["Tarifas", "Tarifa Mensal"]:
+        offers[col] = pd.to_numeric(offers[col], errors="coerce")
+
+    pv = offers["Valor"].to_numpy()
+    installment = offers["Parcela"].to_numpy()
+    n = offers["Prazo"].to_numpy()
+    upfront = offers["Tarifas"].fillna(0).to_numpy()
+    monthly_fee = offers["Tarifa Mensal"].fillna(0).to_numpy()
+
+    offers["Taxa Mensal (%)"] = implied_rate(pv, installment, n, due) * 100
+    # CET: taxa que iguala o valor líquido liberado ao fluxo de parcelas + tarifas.
+    cet = implied_rate(pv - upfront, installment + monthly_fee, n, due)
+    offers["CET Mensal (%)"] = cet * 100
+    offers["CET Anual (%)"] = annual_rate(cet) * 100
+    offers["Total Pago"] = (installment + monthly_fee) * n + upfront
+    offers["Custo Total"] = offers["Total Pago"] - pv
+
+    offers = offers.sort_values("CET Anual (%)", na_position="last").reset_index(drop=True)
+    offers.insert(0, "Ranking", np.arange(1, len(offers) + 1))
+    return offers
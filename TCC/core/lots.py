@@ -0,0 +1,140 @@
+import numpy as np
+
+from core.tax import ir_rate_by_days
+
+COME_COTAS_MONTHS = (5, 11)
+COME_COTAS_RATE = 0.15
+
+
+def _days_held(months):
+    return np.floor(np.asarray(months) * 365 / 12).astype(int)
+
+
+def _quota(rates, months):
+    # Valor da cota por cenário, q[s, t] para t = 0..months. Taxa escalar, por
+    # cenário (S,) ou por cenário e mês (S, months).
+    rates = np.asarray(rates, dtype=float)
+    if rates.ndim < 2:
+        rates = np.broadcast_to(rates.reshape(-1, 1), (rates.size, months))
+    quota = np.ones((rates.shape[0], months + 1))
+    np.cumprod(1 + rates[:, :months], axis=1, out=quota[:, 1:])
+    return quota
+
+
+def _come_cotas_months(months, start_month):
+    # t = fim do t-ésimo mês da aplicação; com start_month = 1, t = 1 é o fim
+    # de janeiro e o come-cotas de maio cai em t = 5.
+    t = np.arange(1, months + 1)
+    calendar = (start_month - 2 + t) % 12 + 1
+    return t[np.isin(calendar, COME_COTAS_MONTHS)]
+
+
+def _redeem(state, quota_t, t, fraction):
+    # IR na fonte sobre a fração resgatada de cada lote: alíquota pelo prazo do
+    # lote sobre o ganho total, descontado o come-cotas já pago por ele. Só os
+    # lotes comprados até t (as primeiras colunas) entram.
+    n = fraction.shape[1]
+    units, cost, paid = state["units"][:, :n], state["cost"][:, :n], state["paid"][:, :n]
+    value = units * quota_t[:, None]
+    aliquot = ir_rate_by_days(_days_held(t - state["bought"][:n]))
+    gain = fraction * (value + paid - cost)
+    tax = np.maximum(gain * aliquot - fraction * paid, 0.0)
+    sold = fraction * value
+
+    kept = 1 - fraction
+    units *= kept
+    cost *= kept
+    paid *= kept
+    return sold, gain, tax, aliquot
+
+
+def simulate_lots(principal, contribution, rates, months, withdrawals=None,
+                  come_cotas=False, come_cotas_rate=COME_COTAS_RATE, start_month=1):
+    # Cada aporte é um lote (lote 0 = aporte inicial no mês 0, lote j = aporte
+    # no fim do mês j), com cotas, custo e prazo próprios. Os resgates
+    # (withdrawals = {mês: valor bruto}) consomem os lotes mais antigos primeiro.
+    quota = _quota(rates, months)
+    n_scenarios = quota.shape[0]
+
+    bought = np.arange(months + 1)
+    if np.ndim(contribution) == 0:
+        amounts = np.full(months + 1, float(contribution))
+    else:
+        amounts = np.concatenate([[0.0], np.asarray(contribution, dtype=float)[:months]])
+    amounts[0] = principal
+
+    state = {
+        "units": amounts / quota[:, bought],
+        "cost": np.broadcast_to(amounts, (n_scenarios, months + 1)).copy(),
+        "paid": np.zeros((n_scenarios, months + 1)),
+        "base": quota[:, bought].copy(),
+        "bought": bought,
+    }
+
+    withdrawals = withdrawals or {}
+    come_cotas_at = set(_come_cotas_months(months, start_month).tolist()) if come_cotas else set()
+    events = sorted({t for t in withdrawals if 0 < t <= months} | come_cotas_at)
+
+    come_cotas_paid = np.zeros(n_scenarios)
+    withdrawn_gross = np.zeros(n_scenarios)
+    withdrawal_tax = np.zeros(n_scenarios)
+
+    for t in events:
+        quota_t = quota[:, t, None]
+        n = t + 1
+
+        if t in come_cotas_at:
+            # Antecipa 15% sobre o rendimento do semestre, resgatando cotas.
+            units, base = state["units"][:, :n], state["base"][:, :n]
+            charge = np.maximum(units * (quota_t - base), 0.0)
+            charge *= come_cotas_rate
+            units -= charge / quota_t
+            state["paid"][:, :n] += charge
+            base[:] = quota_t
+            come_cotas_paid += charge.sum(axis=1)
+
+        if t in withdrawals:
+            amount = np.broadcast_to(np.asarray(withdrawals[t], dtype=float), (n_scenarios,))
+            value = state["units"][:, :n] * quota_t
+            before = np.cumsum(value, axis=1) - value
+            sold = np.clip(amount[:, None] - before, 0.0, value)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fraction = np.where(value > 0, sold / value, 0.0)
+            sold, _, tax, _ = _redeem(state, quota_t[:, 0], t, fraction)
+            withdrawn_gross += sold.sum(axis=1)
+            withdrawal_tax += tax.sum(axis=1)
+
+    # Resgate total no fim do horizonte.
+    cost = state["cost"].copy()
+    paid = state["paid"].copy()
+    value, gain, final_tax, aliquot = _redeem(state, quota[:, months], months, np.ones_like(cost))
+
+    gross = value.sum(axis=1)
+    final_tax_total = final_tax.sum(axis=1)
+    tax = come_cotas_paid + withdrawal_tax + final_tax_total
+    total_gain = gross + withdrawn_gross + come_cotas_paid - amounts.sum()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        effective = np.where(total_gain > 0, tax / total_gain, 0.0)
+
+    return {
+        "invested": float(amounts.sum()),
+        "gross": gross,
+        "come_cotas": come_cotas_paid,
+        "withdrawn_gross": withdrawn_gross,
+        "withdrawn_net": withdrawn_gross - withdrawal_tax,
+        "withdrawal_tax": withdrawal_tax,
+        "final_tax": final_tax_total,
+        "tax": tax,
+        "net": gross - final_tax_total,
+        "effective_rate": effective,
+        "lots": {
+            "month": bought,
+            "amount": amounts,
+            "cost": cost,
+            "value": value,
+            "paid": paid,
+            "gain": gain,
+            "aliquot": aliquot,
+            "tax": final_tax,
+        },
+    }
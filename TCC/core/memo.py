@@ -0,0 +1,116 @@
+import inspect
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+from core.perf import COUNTERS
+
+# Casas decimais das chaves: 1.2 e 1.2000000000000002 (passos do number_input)
+# e 10000 e 10000.0 são a mesma entrada.
+CASAS = 9
+
+MEMOS = {}
+
+
+def normalizar(valor):
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        return round(float(valor), CASAS)
+    if isinstance(valor, dict):
+        return tuple(sorted((normalizar(k), normalizar(v)) for k, v in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar(v) for v in valor)
+    if isinstance(valor, np.ndarray):
+        return (valor.shape, normalizar(valor.ravel().tolist()))
+    return valor
+
+
+class Memo:
+    # LRU limitado, um por processo e compartilhado por todas as sessões. Guarda
+    # o próprio objeto (figuras e DataFrames inclusive), sem copiar nem
+    # serializar: quem recebe um valor daqui não deve alterá-lo.
+    def __init__(self, name, max_entries=256, counters=COUNTERS):
+        self.name = name
+        self.max_entries = max_entries
+        self.counters = counters
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        self.counters.incr("cache_calls", self.name)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return True, self._entries[key]
+        self.counters.incr("cache_misses", self.name)
+        return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                self.counters.incr("cache_evictions", self.name)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def memoize(name, max_entries=256):
+    # Como st.cache_data: argumentos que começam com "_" ficam fora da chave
+    # (passe junto uma versão dos dados, se eles puderem mudar).
+    def decorator(fn):
+        signature = inspect.signature(fn)
+        memo = MEMOS.setdefault(name, Memo(name, max_entries))
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = normalizar([(k, v) for k, v in bound.arguments.items() if not k.startswith("_")])
+            found, value = memo.get(key)
+            if not found:
+                value = fn(*args, **kwargs)
+                memo.put(key, value)
+            return value
+
+        wrapper.memo = memo
+        wrapper.clear = memo.clear
+        return wrapper
+    return decorator
+
+
+def memo_stats(counters=COUNTERS):
+    stats = []
+    for name, memo in sorted(MEMOS.items()):
+        calls = counters.get("cache_calls", name)
+        misses = counters.get("cache_misses", name)
+        stats.append({
+            "Cache": name,
+            "Entradas": len(memo),
+            "Limite": memo.max_entries,
+            "Descartes": memo.evictions,
+            "Acertos": calls - misses,
+            "Taxa de acerto (%)": 100.0 * (calls - misses) / calls if calls else 0.0,
+        })
+    return stats
+
+
+def prometheus_text(prefix="smooth"):
+    lines = [f"# TYPE {prefix}_memo_entries gauge"]
+    for name, memo in sorted(MEMOS.items()):
+        lines.append(f'{prefix}_memo_entries{{key="{name}"}} {len(memo)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from core.tax import ir_rate_by_days
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def paired_history(rates, inflation):
+    df = pd.concat({"rate": rates, "inflation": inflation}, axis=1).dropna()
+    return df["rate"].to_numpy(), df["inflation"].to_numpy()
+
+
+def bootstrap_indices(rng, n_obs, paths, months, block):
+    # Bootstrap em blocos contíguos: mantém a autocorrelação dos juros e a
+    # correlação entre juros e inflação do mesmo mês.
+    block = max(1, min(block, n_obs))
+    n_blocks = -(-months // block)
+    starts = rng.integers(0, n_obs - block + 1, size=(paths, n_blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(paths, -1)[:, :months]
+
+
+def _simulate_chunk(task):
+    rates, inflation, principal, contribution, months, paths, block, seed = task
+    rng = np.random.default_rng(seed)
+    idx = bootstrap_indices(rng, len(rates), paths, months, block)
+
+    growth = np.cumprod(1 + rates[idx], axis=1)
+    gross = growth * (principal + contribution * np.cumsum(1 / growth, axis=1))
+    prices = np.cumprod(1 + inflation[idx], axis=1)
+
+    year_end = np.arange(12, months + 1, 12) - 1
+    years = np.arange(1, len(year_end) + 1)
+    gross, prices = gross[:, year_end], prices[:, year_end]
+
+    invested = principal + contribution * 12 * years
+    net = gross - (gross - invested) * ir_rate_by_days(years * 365)
+    return net, net / prices
+
+
+def simulate(rates, inflation, principal, contribution, years, paths=100_000,
+             block=12, seed=0, chunk=10_000, pool=None):
+    rates = np.asarray(rates, dtype=float)
+    inflation = np.asarray(inflation, dtype=float)
+    months = int(years * 12)
+
+    # Os lotes e as sementes dependem só de `paths` e `chunk`, então o
+    # resultado é o mesmo com ou sem processos.
+    n_chunks = -(-paths // chunk)
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = [
+        (rates, inflation, principal, contribution, months, min(chunk, paths - i * chunk), block, s)
+        for i, s in enumerate(seeds)
+    ]
+
+    # `pool`: um executor de processos já aberto (o app usa um só, compartilhado).
+    if pool is not None and n_chunks > 1:
+        parts = list(pool.map(_simulate_chunk, tasks))
+    else:
+        parts = [_simulate_chunk(task) for task in tasks]
+
+    net = np.concatenate([p[0] for p in parts])
+    real_net = np.concatenate([p[1] for p in parts])
+    invested = principal + contribution * 12 * np.arange(1, net.shape[1] + 1)
+    return {
+        "years": np.arange(1, net.shape[1] + 1),
+        "percentiles": PERCENTILES,
+        "invested": invested,
+        "net": np.percentile(net, PERCENTILES, axis=0),
+        "real_net": np.percentile(real_net, PERCENTILES, axis=0),
+        "prob_real_loss": (real_net[:, -1] < invested[-1]).mean(),
+    }
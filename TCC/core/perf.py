@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+# Se definido, cada medição vira uma linha JSON neste arquivo.
+LOG_PATH = os.environ.get("PERF_LOG_PATH")
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class LatencyLog:
+    def __init__(self, maxlen=500, path=LOG_PATH):
+        self.maxlen = maxlen
+        self.path = path
+        self._samples = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def record(self, name, seconds, kind="section"):
+        key = (kind, name)
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.maxlen)).append(seconds)
+            count, total = self._totals.get(key, (0, 0.0))
+            self._totals[key] = (count + 1, total + seconds)
+            if self.path:
+                self._write({"ts": time.time(), "tipo": kind, "nome": name, "ms": round(seconds * 1000, 3)})
+
+    def _write(self, entry):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def samples(self):
+        with self._lock:
+            return {key: (np.array(values), self._totals[key]) for key, values in self._samples.items()}
+
+    def summary(self):
+        return [
+            {
+                "Tipo": kind,
+                "Seção": name,
+                "Execuções": count,
+                "Última (ms)": values[-1] * 1000,
+                "p50 (ms)": np.percentile(values, 50) * 1000,
+                "p95 (ms)": np.percentile(values, 95) * 1000,
+            }
+            for (kind, name), (values, (count, _)) in sorted(self.samples().items())
+        ]
+
+
+class Counters:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, key="", amount=1):
+        with self._lock:
+            self._values[(name, key)] = self._values.get((name, key), 0) + amount
+
+    def get(self, name, key=""):
+        with self._lock:
+            return self._values.get((name, key), 0)
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def summary(self):
+        return [
+            {"Contador": name, "Chave": key, "Valor": value}
+            for (name, key), value in sorted(self.values().items())
+        ]
+
+
+LATENCY = LatencyLog()
+COUNTERS = Counters()
+
+
+@contextmanager
+def timed(name, log=LATENCY, kind="section"):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        log.record(name, time.perf_counter() - start, kind)
+
+
+def span(kind, name, log=LATENCY):
+    # Tipos usados no app: "section", "fetch", "compute" e "render".
+    return timed(name, log, kind)
+
+
+def timed_section(name, log=LATENCY, kind="section"):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name, log, kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def counted_cache(name, cache, counters=COUNTERS):
+    # Envolve um decorador de cache (ex.: st.cache_data(...)): o corpo só roda
+    # em miss, então acertos = chamadas - misses.
+    def decorator(fn):
+        @wraps(fn)
+        def miss(*args, **kwargs):
+            counters.incr("cache_misses", name)
+            return fn(*args, **kwargs)
+
+        cached = cache(miss)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            counters.incr("cache_calls", name)
+            return cached(*args, **kwargs)
+
+        wrapper.clear = getattr(cached, "clear", None)
+        return wrapper
+    return decorator
+
+
+def cache_stats(counters=COUNTERS):
+    values = counters.values()
+    names = sorted({key for (name, key) in values if name == "cache_calls"})
+    stats = []
+    for name in names:
+        calls = values.get(("cache_calls", name), 0)
+        misses = values.get(("cache_misses", name), 0)
+        stats.append({
+            "Cache": name,
+            "Chamadas": calls,
+            "Acertos": calls - misses,
+            "Misses": misses,
+            "Taxa de acerto (%)": 100.0 * (calls - misses) / calls if calls else 0.0,
+        })
+    return stats
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text(log=LATENCY, counters=COUNTERS, prefix="smooth"):
+    lines = [
+        f"# HELP {prefix}_span_seconds Duração das seções, buscas, cálculos e renderizações.",
+        f"# TYPE {prefix}_span_seconds summary",
+    ]
+    for (kind, name), (values, (count, total)) in sorted(log.samples().items()):
+        labels = f'kind="{_label(kind)}",name="{_label(name)}"'
+        for q in QUANTILES:
+            lines.append(f'{prefix}_span_seconds{{{labels},quantile="{q}"}} {np.quantile(values, q):.6f}')
+        lines.append(f"{prefix}_span_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"{prefix}_span_seconds_count{{{labels}}} {count}")
+
+    by_name = {}
+    for (name, key), value in counters.values().items():
+        by_name.setdefault(name, []).append((key, value))
+    for name, entries in sorted(by_name.items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        for key, value in sorted(entries):
+            lines.append(f'{prefix}_{name}_total{{key="{_label(key)}"}} {value}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# Rebalanceamento: frequência pandas do período (None = comprar e segurar, "D" = todo dia).
+REBALANCE = {
+    "Sem rebalancear": None,
+    "Diário": "D",
+    "Mensal": "M",
+    "Trimestral": "Q",
+    "Anual": "Y",
+}
+
+
+def parse_weights(text):
+    # "PETR4 30, VALE3 20, ITUB4" -> {"PETR4": 30.0, "VALE3": 20.0, "ITUB4": None}
+    weights = {}
+    for item in text.replace(";", ",").replace("\n", ",").split(","):
+        parts = item.replace("=", " ").replace(":", " ").split()
+        if not parts:
+            continue
+        ticker = parts[0].upper()
+        weight = float(parts[1].replace("%", "")) if len(parts) > 1 else None
+        if weight is not None and not 0 < weight < np.inf:
+            raise ValueError(f"Peso inválido para {ticker}: {parts[1]}")
+        weights[ticker] = weight
+    return weights
+
+
+def normalize_weights(weights):
+    # Tickers sem peso dividem igualmente o que sobrou; o total vira 1.
+    tickers = list(weights)
+    given = np.array([w if w is not None else np.nan for w in weights.values()], dtype=float)
+    free = np.isnan(given)
+    rest = max(100.0 - np.nansum(given), 0.0) if free.any() else 0.0
+    given[free] = rest / free.sum() if free.any() else 0.0
+    if given.sum() <= 0:
+        given[:] = 1.0
+    return pd.Series(given / given.sum(), index=tickers)
+
+
+def align_closes(closes):
+    # closes: {ticker: Series de fechamentos indexada por data}. Calendário comum =
+    # união dos pregões; um ticker sem negócio no dia repete o último fechamento.
+    # O backtest começa no primeiro dia em que todos já têm preço.
+    columns = {t: s for t, s in closes.items() if len(s.dropna())}
+    if not columns:
+        return pd.DataFrame()
+    prices = pd.concat(columns, axis=1).sort_index().ffill()
+    return prices[prices.notna().all(axis=1)]
+
+
+def returns(prices):
+    values = prices.to_numpy(dtype=float)
+    return pd.DataFrame(values[1:] / values[:-1] - 1, index=prices.index[1:], columns=prices.columns)
+
+
+def _segments(index, rebalance):
+    # Período de cada retorno (index = datas dos preços, um retorno a menos). O
+    # rebalanceamento acontece no fechamento do último pregão de cada período,
+    # então o retorno seguinte já começa com os pesos-alvo.
+    n = len(index) - 1
+    if rebalance is None:
+        return np.zeros(n, dtype=int)
+    if rebalance == "D":
+        return np.arange(n)
+    periods = index.to_period(rebalance).asi8
+    turns = periods[1:-1] != periods[2:]
+    return np.concatenate([[0], np.cumsum(turns)])[:n]
+
+
+def equity_curve(prices, weights, rebalance="M", initial=1.0):
+    # Curva da carteira com pesos-alvo restaurados a cada período. Dentro de um
+    # período a carteira compra e segura: o valor é a soma dos pesos vezes o
+    # crescimento de cada ativo desde o último rebalanceamento. Tudo em matrizes
+    # (dias x ativos), sem laço por ticker nem por período.
+    w = np.asarray(weights, dtype=float)
+    values = prices.to_numpy(dtype=float)
+    log = np.log(values[1:] / values[:-1])
+    segments = _segments(prices.index, rebalance)
+
+    cum = np.cumsum(log, axis=0)
+    starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+    base = np.vstack([np.zeros(log.shape[1]), cum[starts[1:] - 1]])
+    growth = np.exp(cum - base[segments]) @ w
+
+    # Valor no início de cada período = produto dos crescimentos dos anteriores.
+    ends = np.r_[starts[1:] - 1, len(growth) - 1]
+    chained = np.concatenate([[1.0], np.cumprod(growth[ends])[:-1]])
+    curve = np.concatenate([[1.0], chained[segments] * growth]) * initial
+    return pd.Series(curve, index=prices.index)
+
+
+def drawdown(curve):
+    values = np.asarray(curve, dtype=float)
+    dd = values / np.maximum.accumulate(values) - 1
+    return pd.Series(dd, index=getattr(curve, "index", None))
+
+
+def covariance(rets, annualize=TRADING_DAYS):
+    values = rets.to_numpy(dtype=float)
+    centered = values - values.mean(axis=0)
+    cov = centered.T @ centered / max(len(values) - 1, 1) * annualize
+    return pd.DataFrame(cov, index=rets.columns, columns=rets.columns)
+
+
+def correlation(cov):
+    sd = np.sqrt(np.diag(cov.to_numpy()))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov.to_numpy() / np.outer(sd, sd)
+    return pd.DataFrame(corr, index=cov.index, columns=cov.columns)
+
+
+def curve_stats(curve):
+    values = np.asarray(curve, dtype=float)
+    daily = values[1:] / values[:-1] - 1
+    years = max(len(daily) / TRADING_DAYS, 1 / TRADING_DAYS)
+    vol = daily.std(ddof=1) * np.sqrt(TRADING_DAYS) if len(daily) > 1 else 0.0
+    return {
+        "total": values[-1] / values[0] - 1,
+        "cagr": (values[-1] / values[0]) ** (1 / years) - 1,
+        "vol": vol,
+        "max_drawdown": float(drawdown(values).min()),
+    }
+
+
+def asset_stats(prices, rets, weights, cov):
+    # Uma linha por ativo, tudo vetorizado: retorno anualizado, volatilidade,
+    # pior queda e a contribuição de cada um para o risco da carteira.
+    w = np.asarray(weights, dtype=float)
+    values = prices.to_numpy(dtype=float)
+    years = max(len(rets) / TRADING_DAYS, 1 / TRADING_DAYS)
+    sigma = cov.to_numpy()
+    marginal = sigma @ w
+    variance = w @ marginal
+    dd = values / np.maximum.accumulate(values, axis=0) - 1
+    return pd.DataFrame({
+        "weight": w,
+        "cagr": (values[-1] / values[0]) ** (1 / years) - 1,
+        "vol": np.sqrt(np.diag(sigma)),
+        "max_drawdown": dd.min(axis=0),
+        "risk_share": w * marginal / variance if variance > 0 else np.zeros_like(w),
+    }, index=prices.columns)
+
+
+def backtest(prices, weights, rebalance="M", initial=1.0):
+    weights = pd.Series(weights).reindex(prices.columns).fillna(0.0)
+    weights = weights / weights.sum()
+    rets = returns(prices)
+    cov = covariance(rets)
+    curve = equity_curve(prices, weights.to_numpy(), rebalance, initial)
+    hold = equity_curve(prices, weights.to_numpy(), None, initial)
+    return {
+        "curve": curve,
+        "hold": hold,
+        "drawdown": drawdown(curve),
+        "stats": curve_stats(curve),
+        "hold_stats": curve_stats(hold),
+        "covariance": cov,
+        "correlation": correlation(cov),
+        "assets": asset_stats(prices, rets, weights, cov),
+    }
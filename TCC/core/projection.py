@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from core.tax import apply_tax_and_inflation
+
+
+def project(principal, contribution, rate, periods, contribution_every=1):
+    # Saldo ao fim de cada período k = 0..periods, com aportes postecipados a cada
+    # `contribution_every` períodos:
+    #   P(1+r)^k + C (1+r)^(k - c n) ((1+r)^(c n) - 1) / ((1+r)^c - 1),  n = k // c
+    rate = float(rate)
+    k = np.arange(periods + 1)
+    n = k // contribution_every
+    growth = (1 + rate) ** k
+
+    if rate == 0:
+        return principal + contribution * n.astype(float)
+
+    done = contribution_every * n
+    annuity = (1 + rate) ** (k - done) * ((1 + rate) ** done - 1) / ((1 + rate) ** contribution_every - 1)
+    return principal * growth + contribution * annuity
+
+
+def invested(principal, contribution, periods, contribution_every=1):
+    return principal + contribution * (np.arange(periods + 1) // contribution_every)
+
+
+def final_balance(principal, contribution, rate, periods):
+    rate = np.asarray(rate, dtype=float)
+    growth = (1 + rate) ** periods
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annuity = np.where(rate == 0, periods, (growth - 1) / rate)
+    return principal * growth + contribution * annuity
+
+
+def compound_lump_sum(principal, annual_rate, years, compounds_per_year=12):
+    r = annual_rate
+    n = compounds_per_year
+    t = years
+    fv = principal * (1 + r / n) ** (n * t)
+    return fv
+
+
+def compound_with_contributions(principal, monthly_contribution, annual_rate, years, days_per_month=1):
+    months = int(years * 12)
+    periods = months * days_per_month
+    rate = annual_rate / (12 * days_per_month)
+
+    saldo = project(principal, monthly_contribution, rate, periods, contribution_every=days_per_month)[1:]
+    step = np.arange(1, periods + 1)
+
+    df = pd.DataFrame({"Mes": -(-step // days_per_month), "Saldo": saldo})
+    if days_per_month > 1:
+        df.insert(0, "Dia", step)
+    df["Ano"] = df["Mes"] // 12 + 1
+    return df
+
+
+def sweep(principal, annual_rates, years, contributions, inflation_rates):
+    # Eixos da grade: (taxa, horizonte, aporte, inflação).
+    rate = np.asarray(annual_rates, dtype=float)[:, None, None, None]
+    years = np.asarray(years)[None, :, None, None]
+    contribution = np.asarray(contributions, dtype=float)[None, None, :, None]
+    inflation = np.asarray(inflation_rates, dtype=float)[None, None, None, :]
+
+    months = years * 12
+    gross = final_balance(principal, contribution, rate / 12, months)
+    total_invested = principal + contribution * months
+    result = apply_tax_and_inflation(gross, total_invested, years, inflation)
+
+    result["invested"] = total_invested
+
+    # Cada métrica só guarda os eixos de que depende (o total investido não
+    # varia com taxa nem inflação); quem usa faz np.broadcast_to(..., shape).
+    # Views de broadcast_to seriam copiadas inteiras ao serem serializadas.
+    shape = np.broadcast_shapes(rate.shape, years.shape, contribution.shape, inflation.shape)
+    grid = {key: np.asarray(result[key]) for key in ("invested", "gross", "tax", "net", "real_net")}
+    grid["shape"] = shape
+    return grid
@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+
+import streamlit as st
+
+from core.bancos import BANCOS_CSV, BankStore
+from core.brapi import QuoteClient
+from core.history import HistoryStore
+from core.sgs import SGSStore
+
+# Um objeto de cada por processo, compartilhado por todas as páginas e sessões:
+# trocar de página não recria stores, pools de threads nem o refresh de cotações.
+
+
+@st.cache_resource
+def sgs_store():
+    return SGSStore(max_age=3600, em_fundo=True)
+
+
+@st.cache_resource
+def quote_client():
+    return QuoteClient(ttl=15).start_refresh()
+
+
+@st.cache_resource
+def history_store():
+    return HistoryStore(quote_client(), em_fundo=True)
+
+
+@st.cache_resource
+def bank_store():
+    return BankStore(BANCOS_CSV)
+
+
+@st.cache_resource
+def process_pool():
+    # Um pool só para o processo inteiro. Nada de fork: o servidor do Streamlit
+    # tem várias threads, e um filho criado por fork pode herdar um lock preso.
+    metodo = "forkserver" if "forkserver" in get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=get_context(metodo))
@@ -0,0 +1,245 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from core import fetch
+from core.fetch import default_fetcher
+from core.perf import COUNTERS
+from core.snapshot import OFFLINE, SNAPSHOT_DIR
+from core.storage import DATA_DIR, StoreLocal
+
+BASE_URL = os.environ.get("BCB_BASE_URL", "https://api.bcb.gov.br/dados/serie")
+DB_PATH = os.environ.get("SGS_DB_PATH", os.path.join(DATA_DIR, "sgs.sqlite"))
+# A API limita consultas de séries diárias a janelas de 10 anos.
+JANELA_ANOS = 10
+
+# Unidade das séries de juros e preços usadas nos simuladores.
+SERIES_AO_ANO = {1178, 4389}
+SERIES_AO_DIA = {11, 12}
+SERIES_AO_MES = {433}
+
+
+def _dia(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return pd.Timestamp(valor).date()
+
+
+def parse_sgs(dados):
+    df = pd.DataFrame(dados, columns=["data", "valor"])
+    df["data"] = pd.to_datetime(df["data"], format="%d/%m/%Y")
+    df["valor"] = pd.to_numeric(df["valor"], errors="coerce")
+    return df.dropna().sort_values("data").reset_index(drop=True)
+
+
+def fator_diario(codigo, valores):
+    valores = np.asarray(valores, dtype=float) / 100
+    if codigo in SERIES_AO_ANO:
+        return (1 + valores) ** (1 / 252)
+    if codigo in SERIES_AO_DIA:
+        return 1 + valores
+    raise ValueError(f"Série {codigo} não é uma taxa diária")
+
+
+def taxa_mensal(df, codigo):
+    meses = df["data"].dt.to_period("M")
+    if codigo in SERIES_AO_MES:
+        return pd.Series(df["valor"].to_numpy() / 100, index=meses).groupby(level=0).last()
+    log_fatores = pd.Series(np.log(fator_diario(codigo, df["valor"])), index=meses)
+    return np.expm1(log_fatores.groupby(level=0).sum())
+
+
+def janelas(inicio, fim, anos=JANELA_ANOS):
+    inicio, fim = _dia(inicio), _dia(fim)
+    passo = timedelta(days=anos * 365)
+    while inicio <= fim:
+        corte = min(inicio + passo - timedelta(days=1), fim)
+        yield inicio, corte
+        inicio = corte + timedelta(days=1)
+
+
+def baixar_serie(codigo, inicio, fim, fetcher=None):
+    params = {
+        "formato": "json",
+        "dataInicial": _dia(inicio).strftime("%d/%m/%Y"),
+        "dataFinal": _dia(fim).strftime("%d/%m/%Y"),
+    }
+    try:
+        dados = (fetcher or default_fetcher()).get_json(
+            f"{BASE_URL}/bcdata.sgs.{int(codigo)}/dados", params=params, cache=False
+        )
+    except fetch.HTTPError as e:
+        # O SGS responde 404 quando não há observações no intervalo pedido.
+        if e.response is not None and e.response.status_code == 404:
+            return parse_sgs([])
+        raise
+    return parse_sgs(dados)
+
+
+class SGSStore(StoreLocal):
+    TABELA = "series"
+    CHAVE = "codigo"
+    ROTULO = "sgs"
+
+    def __init__(self, path=DB_PATH, max_age=3600, anos_iniciais=10, workers=8, fetcher=None,
+                 snapshot_dir=SNAPSHOT_DIR, em_fundo=False, offline=OFFLINE):
+        super().__init__(path, max_age, snapshot_dir, em_fundo, offline, "sgs")
+        self.anos_iniciais = anos_iniciais
+        self._fetcher = fetcher
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sgs")
+
+        with self._connect() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS observacoes ("
+                " codigo INTEGER NOT NULL, data TEXT NOT NULL, valor REAL NOT NULL,"
+                " PRIMARY KEY (codigo, data)) WITHOUT ROWID"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS series ("
+                " codigo INTEGER PRIMARY KEY, inicio TEXT NOT NULL,"
+                " ultima TEXT, verificado REAL NOT NULL)"
+            )
+
+    @property
+    def fetcher(self):
+        # Criado no primeiro uso: uma tela servida só pelo pacote/SQLite não importa requests.
+        return self._fetcher or default_fetcher()
+
+
+    def _cobertura_pacote(self, snapshot, codigo):
+        return snapshot.cobertura_sgs(codigo)
+
+    def _do_snapshot(self, snapshot, codigo):
+        return snapshot.sgs(codigo)
+
+    def _gravar(self, con, codigo, df):
+        con.executemany(
+            "INSERT OR REPLACE INTO observacoes (codigo, data, valor) VALUES (?, ?, ?)",
+            zip(
+                [codigo] * len(df),
+                df["data"].dt.strftime("%Y-%m-%d"),
+                df["valor"].astype(float),
+            ),
+        )
+
+    def baixar(self, codigo, inicio, fim):
+        futuros = [
+            self._pool.submit(baixar_serie, codigo, ini, fim_, self.fetcher)
+            for ini, fim_ in janelas(inicio, fim)
+        ]
+        partes = [f.result() for f in futuros]
+        return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+    def sincronizar(self, codigo, inicio, forcar=False):
+        codigo = int(codigo)
+        inicio = _dia(inicio)
+        hoje = date.today()
+
+        with self._trava(codigo):
+            with self._connect() as con:
+                meta = self._carregar_meta(con, codigo)
+
+            if self.offline:
+                COUNTERS.incr("store_hits" if meta else "store_misses", self.ROTULO)
+                return
+
+            novos = []
+            if meta is None:
+                coberto = min(inicio, hoje - timedelta(days=self.anos_iniciais * 365 - 1))
+                ultima, verificado = None, 0.0
+            else:
+                coberto, ultima, verificado = meta
+                if inicio < coberto:
+                    novos.append(self.baixar(codigo, inicio, coberto - timedelta(days=1)))
+                    coberto = inicio
+
+            if forcar or time.time() - verificado > self.max_age:
+                desde = ultima + timedelta(days=1) if ultima else coberto
+                if desde <= hoje:
+                    df = self.baixar(codigo, desde, hoje)
+                    novos.append(df)
+                    if len(df):
+                        ultima = df["data"].iloc[-1].date()
+                verificado = time.time()
+
+            COUNTERS.incr("store_misses" if novos else "store_hits", self.ROTULO)
+            with self._connect() as con:
+                for df in novos:
+                    self._gravar(con, codigo, df)
+                self._gravar_meta(con, codigo, coberto, ultima, verificado)
+
+    def ler(self, codigo, inicio, fim=None):
+        codigo = int(codigo)
+        inicio = _dia(inicio)
+        fim = _dia(fim) if fim is not None else date.today()
+
+        # O que o pacote cobre sai do memory map já tipado; o SQLite só entra
+        # com o que chegou depois dele.
+        partes, desde = [], inicio
+        snapshot = self._snapshot()
+        cobertura = snapshot.cobertura_sgs(codigo) if snapshot else None
+        if cobertura is not None and cobertura[0] <= inicio <= cobertura[1]:
+            partes.append(snapshot.sgs(codigo, inicio, min(fim, cobertura[1])))
+            desde = cobertura[1] + timedelta(days=1)
+            COUNTERS.incr("snapshot_hits", self.ROTULO)
+
+        if desde <= fim or not partes:
+            with self._connect() as con:
+                df = pd.read_sql_query(
+                    "SELECT data, valor FROM observacoes"
+                    " WHERE codigo = ? AND data BETWEEN ? AND ? ORDER BY data",
+                    con,
+                    params=(codigo, desde.isoformat(), fim.isoformat()),
+                )
+            df["data"] = pd.to_datetime(df["data"], format="%Y-%m-%d")
+            if len(df) or not partes:
+                partes.append(df)
+        return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+    def serie(self, codigo, inicio, fim=None):
+        inicio = _dia(inicio)
+        if not (self.em_fundo and self._atualizar_em_fundo(int(codigo), inicio, inicio=inicio)):
+            self.sincronizar(codigo, inicio)
+        return self.ler(codigo, inicio, fim)
+
+    def codigos(self):
+        with self._connect() as con:
+            return [row[0] for row in con.execute("SELECT codigo FROM series ORDER BY codigo")]
+
+    def cobertura(self, codigo):
+        with self._connect() as con:
+            meta = self._meta(con, int(codigo))
+        return meta[:2] if meta else None
+
+    def series(self, codigos, inicio, fim=None):
+        codigos = list(dict.fromkeys(int(c) for c in codigos))
+        resultados, erros = {}, {}
+        with ThreadPoolExecutor(max_workers=max(len(codigos), 1)) as pool:
+            futuros = {c: pool.submit(self.serie, c, inicio, fim) for c in codigos}
+            for codigo, futuro in futuros.items():
+                try:
+                    resultados[codigo] = futuro.result()
+                except (fetch.RequestException, ValueError) as e:
+                    erros[codigo] = e
+        return alinhar(resultados), erros
+
+
+def alinhar(series):
+    colunas = {
+        codigo: df.set_index("data")["valor"]
+        for codigo, df in series.items()
+        if not df.empty
+    }
+    if not colunas:
+        return pd.DataFrame()
+    return pd.concat(colunas, axis=1).sort_index()
+
+
+def normalizar(df, base=100.0):
+    return df.div(df.bfill().iloc[0]) * base
@@ -0,0 +1,292 @@
+# Pacote de dados pré-montado: séries do SGS, histórico e cotações da Brapi e o
+# CSV de bancos em arquivos Arrow (IPC) já tipados, abertos por memory map. Os
+# stores leem daqui na partida e só vão à rede pelo que veio depois do pacote.
+#
+#     python -m core.snapshot                 # sincroniza e grava um novo pacote
+#     python -m core.snapshot --sem-rede      # só exporta o que já está nos stores
+#
+# Cada pacote fica em SNAPSHOT_DIR/v{FORMATO}-{data}; o arquivo ATUAL aponta para o
+# mais recente e é trocado atomicamente, então um processo nunca vê um pacote pela metade.
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from core.storage import DATA_DIR
+
+SNAPSHOT_DIR = os.environ.get("SMOOTH_SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshot"))
+# Sem rede: os stores servem só o que têm (pacote + SQLite).
+OFFLINE = os.environ.get("SMOOTH_OFFLINE", "") == "1"
+FORMATO = 1
+MANTER = 2
+
+SGS_PADRAO = (1178, 433, 1, 12, 11)
+TICKERS_PADRAO = ("PETR4", "VALE3", "ITUB4", "MXRF11", "BBAS3")
+CAMPOS_COTACAO = {
+    "symbol": pa.string(),
+    "longName": pa.string(),
+    "regularMarketPrice": pa.float64(),
+    "regularMarketChangePercent": pa.float64(),
+    "regularMarketVolume": pa.int64(),
+    "regularMarketDayHigh": pa.float64(),
+    "regularMarketDayLow": pa.float64(),
+    "regularMarketTime": pa.string(),
+}
+COLUNAS_BARRAS = ["open", "high", "low", "close", "volume", "adjustedClose"]
+# Resolução das datas lidas do SQLite (ns no pandas 2, us no 3): o pacote devolve a mesma.
+UNIDADE_DATAS = pd.to_datetime(["2000-01-01"], format="%Y-%m-%d").dtype
+
+
+def crc_arquivo(path):
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read())
+
+
+def _gravar_tabela(diretorio, nome, tabela):
+    # IPC sem compressão: é o que permite ler direto do memory map, sem cópia.
+    with pa.OSFile(os.path.join(diretorio, f"{nome}.arrow"), "wb") as f:
+        with pa.ipc.new_file(f, tabela.schema) as writer:
+            writer.write_table(tabela)
+
+
+def _agrupado(partes, chave, tipo_chave, colunas, coberturas=None):
+    # Concatena os frames por chave, ordenados, e guarda onde cada um começa:
+    # ler uma série é só um slice da tabela. "inicio" é desde quando o pacote
+    # tem tudo (a cobertura do store, que pode vir antes da primeira observação).
+    coberturas = coberturas or {}
+    indice, frames, inicio = {}, [], 0
+    for valor, df in sorted(partes.items()):
+        if df.empty:
+            continue
+        df = df.sort_values(colunas[0])
+        primeira = df[colunas[0]].iloc[0].date()
+        indice[str(valor)] = {
+            "linha": inicio,
+            "linhas": len(df),
+            "inicio": min(coberturas.get(valor) or primeira, primeira).isoformat(),
+            "ultima": df[colunas[0]].iloc[-1].date().isoformat(),
+        }
+        frames.append(df.assign(**{chave: valor})[[chave, *colunas]])
+        inicio += len(df)
+    if frames:
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = pd.DataFrame({chave: pd.Series(dtype=object), **{c: pd.Series(dtype=float) for c in colunas}})
+    schema = pa.schema(
+        [(chave, tipo_chave), (colunas[0], pa.timestamp("ns"))]
+        + [(c, pa.float64()) for c in colunas[1:]]
+    )
+    df[colunas[0]] = pd.to_datetime(df[colunas[0]]).astype("datetime64[ns]")
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False), indice
+
+
+def gravar(sgs=None, barras=None, cotacoes=None, bancos=None, bancos_crc=None, coberturas=None,
+           diretorio=SNAPSHOT_DIR):
+    # sgs = {codigo: df(data, valor)}, barras = {ticker: df(date, open, ...)},
+    # cotacoes = [dict da Brapi], bancos = linhas do CSV já lidas,
+    # coberturas = {codigo ou ticker: data desde a qual o store tem tudo}.
+    coberturas = coberturas or {}
+    os.makedirs(diretorio, exist_ok=True)
+    agora = datetime.now()
+    nome = f"v{FORMATO}-{agora:%Y%m%dT%H%M%S}"
+    temporario = os.path.join(diretorio, f".{nome}.tmp")
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    manifesto = {"formato": FORMATO, "criado": agora.timestamp(), "sgs": {}, "barras": {}, "cotacoes": 0, "bancos": None}
+
+    tabela, manifesto["sgs"] = _agrupado(
+        {int(c): df[["data", "valor"]] for c, df in (sgs or {}).items()}, "codigo", pa.int32(), ["data", "valor"],
+        coberturas,
+    )
+    _gravar_tabela(temporario, "sgs", tabela)
+
+    tabela, manifesto["barras"] = _agrupado(
+        {t.upper(): df[["date", *COLUNAS_BARRAS]] for t, df in (barras or {}).items()},
+        "ticker", pa.string(), ["date", *COLUNAS_BARRAS], coberturas,
+    )
+    _gravar_tabela(temporario, "barras", tabela)
+
+    cotacoes = cotacoes or []
+    colunas = {
+        campo: pa.array(
+            [str(c[campo]) if tipo == pa.string() and c.get(campo) is not None else c.get(campo) for c in cotacoes],
+            type=tipo,
+        )
+        for campo, tipo in CAMPOS_COTACAO.items()
+    }
+    _gravar_tabela(temporario, "cotacoes", pa.table(colunas))
+    manifesto["cotacoes"] = len(cotacoes)
+
+    if bancos is not None:
+        _gravar_tabela(temporario, "bancos", pa.Table.from_pandas(bancos, preserve_index=False))
+        manifesto["bancos"] = {"crc": bancos_crc, "linhas": len(bancos)}
+
+    with open(os.path.join(temporario, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1)
+
+    destino = os.path.join(diretorio, nome)
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    ponteiro = os.path.join(diretorio, f".ATUAL.{os.getpid()}")
+    with open(ponteiro, "w", encoding="utf-8") as f:
+        f.write(nome)
+    os.replace(ponteiro, os.path.join(diretorio, "ATUAL"))
+
+    # Os pacotes antigos podem estar mapeados por outro processo; no Linux o
+    # mapeamento continua válido depois da remoção.
+    antigos = sorted(d for d in os.listdir(diretorio) if d.startswith(f"v{FORMATO}-") and d != nome)
+    for d in antigos[:max(len(antigos) - (MANTER - 1), 0)]:
+        shutil.rmtree(os.path.join(diretorio, d), ignore_errors=True)
+    return destino
+
+
+class Snapshot:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "manifesto.json"), encoding="utf-8") as f:
+            self.manifesto = json.load(f)
+        if self.manifesto.get("formato") != FORMATO:
+            raise ValueError(f"Pacote {path} tem formato {self.manifesto.get('formato')}, esperado {FORMATO}")
+        self.criado = self.manifesto["criado"]
+        self._tabelas = {}
+        self._lock = threading.Lock()
+
+    def tabela(self, nome):
+        with self._lock:
+            if nome not in self._tabelas:
+                arquivo = os.path.join(self.path, f"{nome}.arrow")
+                # Os buffers da tabela apontam para o mapeamento, que vive enquanto ela viver.
+                with pa.memory_map(arquivo) as fonte:
+                    self._tabelas[nome] = pa.ipc.open_file(fonte).read_all()
+            return self._tabelas[nome]
+
+    def _cobertura(self, grupo, chave):
+        meta = self.manifesto[grupo].get(str(chave))
+        if meta is None:
+            return None
+        return date.fromisoformat(meta["inicio"]), date.fromisoformat(meta["ultima"])
+
+    def _fatia(self, grupo, chave, coluna_data, inicio, fim):
+        meta = self.manifesto[grupo][str(chave)]
+        tabela = self.tabela(grupo).slice(meta["linha"], meta["linhas"])
+        datas = tabela.column(coluna_data).to_numpy()
+        a = 0 if inicio is None else np.searchsorted(datas, np.datetime64(inicio, "ns"), side="left")
+        b = len(datas) if fim is None else np.searchsorted(datas, np.datetime64(fim, "ns"), side="right")
+        df = tabela.slice(a, b - a).drop_columns([tabela.column_names[0]]).to_pandas()
+        df[coluna_data] = df[coluna_data].astype(UNIDADE_DATAS)
+        return df
+
+    def cobertura_sgs(self, codigo):
+        return self._cobertura("sgs", int(codigo))
+
+    def sgs(self, codigo, inicio=None, fim=None):
+        return self._fatia("sgs", int(codigo), "data", inicio, fim)
+
+    def cobertura_barras(self, ticker):
+        return self._cobertura("barras", ticker.upper())
+
+    def barras(self, ticker, inicio=None, fim=None):
+        return self._fatia("barras", ticker.upper(), "date", inicio, fim)
+
+    def cotacoes(self):
+        if not self.manifesto["cotacoes"]:
+            return []
+        cotacoes = self.tabela("cotacoes").to_pylist()
+        for c in cotacoes:
+            if c["regularMarketTime"] is not None and c["regularMarketTime"].lstrip("-").isdigit():
+                c["regularMarketTime"] = int(c["regularMarketTime"])
+        return cotacoes
+
+    def bancos(self, crc):
+        meta = self.manifesto.get("bancos")
+        if not meta or meta["crc"] != crc:
+            return None
+        return self.tabela("bancos").to_pandas()
+
+
+_atual = {"chave": None, "snapshot": None}
+_atual_lock = threading.Lock()
+
+
+def atual(diretorio=SNAPSHOT_DIR):
+    # Pacote apontado por ATUAL, reaberto só quando o ponteiro muda (um stat por chamada).
+    ponteiro = os.path.join(diretorio, "ATUAL")
+    try:
+        st = os.stat(ponteiro)
+    except FileNotFoundError:
+        return None
+    chave = (diretorio, st.st_mtime_ns, st.st_ino)
+    if _atual["chave"] == chave:
+        return _atual["snapshot"]
+    with _atual_lock:
+        if _atual["chave"] != chave:
+            try:
+                with open(ponteiro, encoding="utf-8") as f:
+                    snapshot = Snapshot(os.path.join(diretorio, f.read().strip()))
+            except (OSError, ValueError, KeyError):
+                snapshot = None
+            _atual.update(chave=chave, snapshot=snapshot)
+        return _atual["snapshot"]
+
+
+def main():
+    from core.bancos import BANCOS_CSV, BankStore
+    from core.brapi import QuoteClient
+    from core.history import HistoryStore
+    from core.sgs import SGSStore
+
+    parser = argparse.ArgumentParser(description="Grava o pacote de dados usado na partida dos apps.")
+    parser.add_argument("--sgs", type=int, nargs="*", default=list(SGS_PADRAO))
+    parser.add_argument("--tickers", nargs="*", default=list(TICKERS_PADRAO))
+    parser.add_argument("--anos", type=int, default=30, help="anos de histórico das séries do SGS")
+    parser.add_argument("--periodo", default="10y", help="faixa do histórico da Brapi")
+    parser.add_argument("--sem-rede", action="store_true", help="não sincroniza, só exporta o que os stores têm")
+    parser.add_argument("--diretorio", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    inicio_execucao = time.perf_counter()
+    sgs_store = SGSStore(max_age=0, snapshot_dir=None)
+    cliente = QuoteClient(ttl=0, snapshot_dir=None)
+    historico = HistoryStore(cliente, max_age=0, snapshot_dir=None)
+
+    inicio = date.today() - timedelta(days=args.anos * 365)
+    if not args.sem_rede:
+        _, erros = sgs_store.series(args.sgs, inicio)
+        _, erros_brapi = historico.historicos(args.tickers, args.periodo)
+        for chave, e in {**erros, **erros_brapi}.items():
+            print(f"{chave}: {e}")
+
+    # Exporta tudo o que os stores têm, não só o que foi pedido agora.
+    sgs = {codigo: sgs_store.ler(codigo, date.min) for codigo in sgs_store.codigos()}
+    barras = {ticker: historico.ler(ticker, "max") for ticker in historico.tickers()}
+    cotacoes = [] if args.sem_rede else cliente.get_quotes(sorted(barras) or args.tickers)
+
+    coberturas = {codigo: sgs_store.cobertura(codigo)[0] for codigo in sgs}
+    coberturas.update({ticker: historico.cobertura(ticker)[0] for ticker in barras})
+    bancos = BankStore(BANCOS_CSV, snapshot_dir=None)
+    destino = gravar(
+        sgs=sgs,
+        barras=barras,
+        cotacoes=cotacoes,
+        bancos=bancos.current().rows,
+        bancos_crc=crc_arquivo(BANCOS_CSV),
+        coberturas=coberturas,
+        diretorio=args.diretorio,
+    )
+    print(
+        f"{destino}: {len(sgs)} série(s), {len(barras)} ticker(s), {len(cotacoes)} cotação(ões)"
+        f" em {time.perf_counter() - inicio_execucao:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+from core.perf import COUNTERS
+
+DATA_DIR = os.environ.get(
+    "SMOOTH_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"),
+)
+
+
+@contextmanager
+def connect(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    con = sqlite3.connect(path, timeout=30)
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+class StoreLocal:
+    # O que o SGSStore e o HistoryStore têm em comum: uma trava por série, a
+    # tabela de metadados (início, última data, verificação), a semeadura pelo
+    # pacote e a atualização em segundo plano. Cada subclasse diz onde ficam os
+    # metadados (TABELA, CHAVE), como o pacote a cobre e como sincronizar.
+    # ROTULO é fixo por store: códigos e tickers digitados pelo usuário não
+    # viram rótulos de contador.
+    TABELA = None
+    CHAVE = None
+    ROTULO = None
+
+    def __init__(self, path, max_age, snapshot_dir, em_fundo, offline, nome):
+        self.path = path
+        self.max_age = max_age
+        self.snapshot_dir = snapshot_dir
+        self.em_fundo = em_fundo
+        self.offline = offline
+        self._fundo = ThreadPoolExecutor(max_workers=2, thread_name_prefix=f"{nome}-fundo")
+        self._atualizando = set()
+        self._lock = threading.Lock()
+        self._travas = {}
+
+    def _connect(self):
+        return connect(self.path)
+
+    def _trava(self, chave):
+        with self._lock:
+            return self._travas.setdefault(chave, threading.Lock())
+
+    def _snapshot(self):
+        # Import tardio: core.snapshot importa este módulo.
+        from core.snapshot import atual
+
+        return atual(self.snapshot_dir) if self.snapshot_dir else None
+
+    def _meta(self, con, chave):
+        row = con.execute(
+            f"SELECT inicio, ultima, verificado FROM {self.TABELA} WHERE {self.CHAVE} = ?", (chave,)
+        ).fetchone()
+        if row is None:
+            return None
+        return date.fromisoformat(row[0]), date.fromisoformat(row[1]) if row[1] else None, row[2]
+
+    def _gravar_meta(self, con, chave, inicio, ultima, verificado):
+        con.execute(
+            f"INSERT OR REPLACE INTO {self.TABELA} ({self.CHAVE}, inicio, ultima, verificado)"
+            " VALUES (?, ?, ?, ?)",
+            (chave, inicio.isoformat(), ultima.isoformat() if ultima else None, verificado),
+        )
+
+    def _semear(self, con, chave):
+        # Primeira vez que o store vê a série: começa pelo pacote em vez da rede.
+        snapshot = self._snapshot()
+        cobertura = self._cobertura_pacote(snapshot, chave) if snapshot else None
+        if cobertura is None:
+            return None
+        self._gravar(con, chave, self._do_snapshot(snapshot, chave))
+        meta = (cobertura[0], cobertura[1], snapshot.criado)
+        self._gravar_meta(con, chave, *meta)
+        COUNTERS.incr("snapshot_seeds", self.ROTULO)
+        return meta
+
+    def _carregar_meta(self, con, chave):
+        return self._meta(con, chave) or self._semear(con, chave)
+
+    def _atualizar_em_fundo(self, chave, desde, **kwargs):
+        # Se o store já cobre o período, responde com o que tem e atualiza em
+        # segundo plano; a próxima execução da página já vê os dados novos.
+        with self._connect() as con:
+            meta = self._carregar_meta(con, chave)
+        if meta is None or desde < meta[0]:
+            return False
+        if not self.offline and time.time() - meta[2] > self.max_age:
+            with self._lock:
+                if chave in self._atualizando:
+                    return True
+                self._atualizando.add(chave)
+            # Falhas ficam nos contadores do Fetcher; a série antiga continua valendo.
+            futuro = self._fundo.submit(self.sincronizar, chave, **kwargs)
+            futuro.add_done_callback(lambda _: self._atualizando.discard(chave))
+        return True
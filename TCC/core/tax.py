@@ -0,0 +1,20 @@
+import numpy as np
+
+IR_DAY_LIMITS = np.array([180, 360, 720])
+IR_RATES = np.array([0.225, 0.20, 0.175, 0.15])
+
+
+def ir_rate_by_days(days):
+    rate = IR_RATES[np.searchsorted(IR_DAY_LIMITS, days, side="left")]
+    return rate if np.ndim(days) else float(rate)
+
+
+def apply_tax_and_inflation(gross, principal, years, inflation_rate=0.0):
+    invested = principal
+    gain = gross - invested
+    days = np.floor(np.multiply(years, 365)).astype(int)
+    aliquot = ir_rate_by_days(days)
+    tax = gain * aliquot
+    net = gross - tax
+    real_net = net / ((1 + np.asarray(inflation_rate)) ** years)
+    return {"gross": gross, "tax": tax, "net": net, "real_net": real_net, "aliquot": aliquot}
@@ -1,9 +1,16 @@
-import pandas as pd
-import plotly.express as px
 import streamlit as st
-import requests
+import time
 from datetime import datetime, timedelta
 
+from core import fetch
+from core.charts import line_figure
+from core.debug import fim_da_execucao, mostrar_grafico
+from core.perf import counted_cache, span, timed_section
+from core.recursos import sgs_store
+from core.sgs import normalizar
+
+inicio_execucao = time.perf_counter()
+
 st.set_page_config(page_title="Indicadores BCB", layout="wide")
 
 st.markdown("""
@@ -16,28 +23,25 @@ st.markdown("""
 st.title("Dashboard de Indicadores Econômicos - Banco Central")
 st.markdown("Dados oficiais do Banco Central do Brasil em tempo real")
 
-@st.cache_data(ttl=3600)
-def buscar_selic(anos=4):
-    codigo_serie = 1178
-    data_final = datetime.today().strftime('%d/%m/%Y')
-    data_inicial = (datetime.today() - timedelta(days=anos*365)).strftime('%d/%m/%Y')
-    
-    url = f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo_serie}/dados?formato=json&dataInicial={data_inicial}&dataFinal={data_final}"
-    
+def buscar_serie(codigo_serie, anos=4):
+    data_inicial = datetime.today() - timedelta(days=anos*365)
+
     try:
-        resposta = requests.get(url, timeout=10)
-        dados = resposta.json()
-        
-        df = pd.DataFrame(dados)
-        df['data'] = pd.to_datetime(df['data'], dayfirst=True)
-        df['valor'] = df['valor'].astype(float)
-        df = df.sort_values('data').reset_index(drop=True)
-        
-        return df
-    except Exception as e:
+        with span("fetch", "sgs — série"):
+            return sgs_store().serie(codigo_serie, data_inicial)
+    except (fetch.RequestException, ValueError) as e:
         st.error(f"Erro ao buscar dados: {str(e)}")
         return None
 
+
+def buscar_series(codigos, anos):
+    data_inicial = datetime.today() - timedelta(days=anos*365)
+    with span("fetch", "sgs — comparação"):
+        df, erros = sgs_store().series(codigos, data_inicial)
+    for codigo, e in erros.items():
+        st.error(f"Erro ao buscar a série {codigo}: {str(e)}")
+    return df
+
 series_disponiveis = {
     "1178": {"nome": "Taxa SELIC", "unidade": "% a.a."},
     "433": {"nome": "IPCA", "unidade": "% mês"},
@@ -45,88 +49,155 @@ series_disponiveis = {
     "12": {"nome": "CDI", "unidade": "% a.a."}
 }
 
-serie_selecionada = st.selectbox(
-    "Indicador Principal",
-    options=list(series_disponiveis.keys()),
-    format_func=lambda x: series_disponiveis[x]["nome"],
-    index=0
-)
+@counted_cache("grafico_principal", st.cache_data(max_entries=64, show_spinner=False))
+def grafico_principal(codigo, anos, chave, _df):
+    info = series_disponiveis[codigo]
+    fig = line_figure(_df['data'], {info['nome']: _df['valor']})
+    fig.update_traces(line_color='#1e3a8a', line_width=2)
+    fig.update_layout(
+        title=f"{info['nome']} - Últimos {anos} anos",
+        xaxis_title='Data',
+        yaxis_title=info['unidade'],
+        showlegend=False,
+        hovermode='x unified',
+        height=700,
+        plot_bgcolor='white',
+        xaxis=dict(showgrid=True, gridcolor='#e5e7eb'),
+        yaxis=dict(showgrid=True, gridcolor='#e5e7eb')
+    )
+    return fig
 
-anos_periodo = st.slider("Período (anos)", min_value=1, max_value=10, value=4, key="anos_slider")
 
-with st.spinner("Carregando dados do Banco Central..."):
-    if serie_selecionada == "1178":
-        df_principal = buscar_selic(anos=anos_periodo)
-    else:
-        codigo_serie = int(serie_selecionada)
-        data_final = datetime.today().strftime('%d/%m/%Y')
-        data_inicial = (datetime.today() - timedelta(days=anos_periodo*365)).strftime('%d/%m/%Y')
-        
-        url = f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{codigo_serie}/dados?formato=json&dataInicial={data_inicial}&dataFinal={data_final}"
-        
-        try:
-            resposta = requests.get(url, timeout=10)
-            dados = resposta.json()
-            
-            df_principal = pd.DataFrame(dados)
-            df_principal['data'] = pd.to_datetime(df_principal['data'], dayfirst=True)
-            df_principal['valor'] = df_principal['valor'].astype(float)
-            df_principal = df_principal.sort_values('data').reset_index(drop=True)
-        except Exception as e:
-            st.error(f"Erro ao buscar dados: {str(e)}")
-            df_principal = None
-
-if df_principal is not None and not df_principal.empty:
-    
-    info = series_disponiveis[serie_selecionada]
-    
-    valor_atual = df_principal['valor'].iloc[-1]
-    valor_anterior = df_principal['valor'].iloc[-2] if len(df_principal) > 1 else valor_atual
-    variacao = valor_atual - valor_anterior
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric(
-            f"{info['nome']} Atual",
-            f"{valor_atual:.2f} {info['unidade']}",
-            f"{variacao:+.2f}" if variacao != 0 else "—"
-        )
-    with col2:
-        st.metric("Máxima", f"{df_principal['valor'].max():.2f} {info['unidade']}")
-    with col3:
-        st.metric("Mínima", f"{df_principal['valor'].min():.2f} {info['unidade']}")
-        
-    st.subheader(f"Evolução: {info['nome']}")
-    
-    fig_principal = px.line(
-        df_principal,
-        x='data',
-        y='valor',
-        title=f"{info['nome']} - Últimos {anos_periodo} anos",
-        labels={'valor': info['unidade'], 'data': 'Data'},
-        markers=True
-    )
-    fig_principal.update_traces(line_color='#1e3a8a', line_width=2)
-    fig_principal.update_layout(
+@counted_cache("grafico_comparacao", st.cache_data(max_entries=64, show_spinner=False))
+def grafico_comparacao(codigos, anos, normalizado, chave, _df):
+    fig = line_figure(_df.index, {col: _df[col] for col in _df.columns})
+    fig.update_layout(
+        title=f"Comparação - Últimos {anos} anos",
+        xaxis_title='Data',
+        yaxis_title='Base 100' if normalizado else 'Valor',
+        legend_title='Indicador',
         hovermode='x unified',
-        height=700,
+        height=600,
         plot_bgcolor='white',
         xaxis=dict(showgrid=True, gridcolor='#e5e7eb'),
         yaxis=dict(showgrid=True, gridcolor='#e5e7eb')
     )
-    st.plotly_chart(fig_principal, use_container_width=True)
-    
-    with st.expander("Ver Dados Completos"):
-        df_show = df_principal.copy()
-        df_show = df_show.sort_values('data', ascending=True)
-        df_show['data'] = df_show['data'].dt.strftime('%d/%m/%Y')
-        df_show = df_show.rename(
-            columns={'data': 'Data', 'valor': f'Valor ({info["unidade"]})'}
-        )
-        st.dataframe(df_show, hide_index=True, use_container_width=True)
-    
-else:
-    st.warning("Não foi possível carregar os dados.")
+    return fig
+
+
+@st.fragment
+@timed_section("Dados governo — indicador principal")
+def painel_principal():
+    serie_selecionada = st.selectbox(
+        "Indicador Principal",
+        options=list(series_disponiveis.keys()),
+        format_func=lambda x: series_disponiveis[x]["nome"],
+        index=0
+    )
+
+    anos_periodo = st.slider("Período (anos)", min_value=1, max_value=10, value=4, key="anos_slider")
+
+    with st.spinner("Carregando dados do Banco Central..."):
+        df_principal = buscar_serie(int(serie_selecionada), anos=anos_periodo)
+
+    if df_principal is not None and not df_principal.empty:
+
+        info = series_disponiveis[serie_selecionada]
+
+        valor_atual = df_principal['valor'].iloc[-1]
+        valor_anterior = df_principal['valor'].iloc[-2] if len(df_principal) > 1 else valor_atual
+        variacao = valor_atual - valor_anterior
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(
+                f"{info['nome']} Atual",
+                f"{valor_atual:.2f} {info['unidade']}",
+                f"{variacao:+.2f}" if variacao != 0 else "—"
+            )
+        with col2:
+            st.metric("Máxima", f"{df_principal['valor'].max():.2f} {info['unidade']}")
+        with col3:
+            st.metric("Mínima", f"{df_principal['valor'].min():.2f} {info['unidade']}")
+
+        st.subheader(f"Evolução: {info['nome']}")
+
+        datas = df_principal['data']
+        chave = (tuple(df_principal.columns), str(datas.iloc[0]), str(datas.iloc[-1]), len(df_principal))
+        fig_principal = grafico_principal(serie_selecionada, anos_periodo, chave, df_principal)
+        mostrar_grafico("Dados governo — indicador principal", fig_principal)
+
+        with st.expander("Ver Dados Completos"):
+            df_show = df_principal.copy()
+            df_show = df_show.sort_values('data', ascending=True)
+            df_show['data'] = df_show['data'].dt.strftime('%d/%m/%Y')
+            df_show = df_show.rename(
+                columns={'data': 'Data', 'valor': f'Valor ({info["unidade"]})'}
+            )
+            st.dataframe(df_show, hide_index=True, use_container_width=True)
+
+    else:
+        st.warning("Não foi possível carregar os dados.")
+
+
+painel_principal()
+
+st.divider()
+st.subheader("Comparar Indicadores")
+
+@st.fragment
+@timed_section("Dados governo — comparação")
+def painel_comparacao():
+    if st.checkbox("Ativar modo de comparação", key="modo_comparacao"):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            series_comparadas = st.multiselect(
+                "Indicadores",
+                options=list(series_disponiveis.keys()),
+                default=["1178", "12"],
+                format_func=lambda x: series_disponiveis[x]["nome"]
+            )
+        with col2:
+            codigos_extras = st.text_input("Outros códigos SGS (separados por vírgula)", "")
+
+        col3, col4 = st.columns([2, 1])
+        with col3:
+            anos_comparacao = st.slider("Período da comparação (anos)", min_value=1, max_value=30, value=10, key="anos_comparacao")
+        with col4:
+            normalizado = st.checkbox("Normalizar (base 100)", key="normalizar_comparacao")
+
+        extras = [c.strip() for c in codigos_extras.split(",") if c.strip()]
+        invalidos = [c for c in extras if not c.isdigit()]
+        if invalidos:
+            st.warning(f"Códigos ignorados: {', '.join(invalidos)}")
+
+        codigos = [int(c) for c in series_comparadas] + [int(c) for c in extras if c.isdigit()]
+
+        if codigos:
+            with st.spinner("Carregando séries do Banco Central..."):
+                df_comparacao = buscar_series(codigos, anos_comparacao)
+
+            if not df_comparacao.empty:
+                if normalizado:
+                    df_comparacao = normalizar(df_comparacao)
+                df_comparacao.columns = [
+                    series_disponiveis.get(str(c), {"nome": f"SGS {c}"})["nome"]
+                    for c in df_comparacao.columns
+                ]
+
+                chave = (
+                    tuple(df_comparacao.columns), str(df_comparacao.index[0]),
+                    str(df_comparacao.index[-1]), len(df_comparacao),
+                )
+                fig_comparacao = grafico_comparacao(
+                    tuple(codigos), anos_comparacao, normalizado, chave, df_comparacao
+                )
+                mostrar_grafico("Dados governo — comparação", fig_comparacao)
+        else:
+            st.info("Selecione ao menos um indicador para comparar.")
+
+
+painel_comparacao()
 
 st.divider()
 st.markdown("""
@@ -134,4 +205,6 @@ st.markdown("""
     Dados oficiais do Banco Central do Brasil | Atualização em tempo real<br>
     API BCB: <a href='https://dadosabertos.bcb.gov.br' target='_blank'>dadosabertos.bcb.gov.br</a>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+fim_da_execucao("Dados governo", inicio_execucao)
@@ -1,8 +1,18 @@
 import streamlit as st
+import time
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 
+from core.amortization import pmt, price_schedule, sac_schedule
+from core.debug import fim_da_execucao, mostrar_grafico
+from core.loans import annual_rate, compare_offers, implied_rate
+from core.memo import memoize
+from core.perf import span, timed_section
+from core.projection import final_balance, invested, project
+
+inicio_execucao = time.perf_counter()
+
 st.set_page_config(page_title="Parcelas e juros", layout="wide")
 st.title("Parcelas e juros")
 
@@ -21,12 +31,63 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-tab1, tab3 = st.tabs([
+# Entradas repetidas (os valores padrão, sobretudo) reaproveitam o resultado e
+# a figura de qualquer sessão anterior.
+@memoize("juros_compostos")
+def juros_compostos(pv, taxa, periodo, aporte):
+    fv_total = float(final_balance(pv, aporte, taxa / 100, periodo))
+    total_investido = pv + (aporte * periodo)
+    return fv_total, total_investido, fv_total - total_investido
+
+
+@memoize("grafico_juros_compostos")
+def grafico_juros_compostos(pv, taxa, periodo, aporte):
+    i = taxa / 100
+    meses = np.arange(periodo + 1)
+    valores_investidos = invested(pv, aporte, periodo)
+    valores_futuros = project(pv, aporte, i, periodo)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=meses, y=valores_investidos, name="Investido", line=dict(color="orange")))
+    fig.add_trace(go.Scatter(x=meses, y=valores_futuros, name="Valor Total", line=dict(color="green")))
+    fig.update_layout(title="Evolução do Investimento", xaxis_title="Meses", yaxis_title="Valor (R$)", height=400)
+    return fig
+
+
+@memoize("parcela")
+def calcular_parcela(pv, taxa, n, due):
+    parcela = pmt(pv, taxa / 100, n, due=due)
+    total_pago = parcela * n
+    return parcela, total_pago, total_pago - pv
+
+
+@memoize("amortizacao", max_entries=64)
+def amortizacao(sistema, pv, taxa, n, due, pagamentos_extras):
+    i = taxa / 100
+    with span("compute", "tabela de amortização"):
+        if sistema == "Price":
+            df_amort = price_schedule(pv, i, n, due=due, prepayments=pagamentos_extras)
+        else:
+            df_amort = sac_schedule(pv, i, n, prepayments=pagamentos_extras)
+
+    fig_amort = go.Figure()
+    fig_amort.add_trace(go.Scatter(x=df_amort["Mês"], y=df_amort["Saldo Final"], name="Saldo Devedor", line=dict(color="#1f77b4")))
+    fig_amort.add_trace(go.Scatter(x=df_amort["Mês"], y=df_amort["Juros Acumulados"], name="Juros Acumulados", line=dict(color="red")))
+    fig_amort.add_trace(go.Scatter(x=df_amort["Mês"], y=df_amort["Amortização Acumulada"], name="Amortização Acumulada", line=dict(color="green")))
+    fig_amort.update_layout(title=f"Evolução do Financiamento ({sistema})", xaxis_title="Meses", yaxis_title="Valor (R$)", height=400)
+    return df_amort, fig_amort, df_amort.to_csv(index=False).encode("utf-8")
+
+
+tab1, tab3, tab4 = st.tabs([
     "Juros Compostos", 
     "Parcelas (PMT)",
+    "Comparar Ofertas",
 ])
 
-with tab1:
+
+@st.fragment
+@timed_section("Parcelas — juros compostos")
+def aba_juros_compostos():
     st.header("Calculadora de Juros Compostos")
     st.write("Calcule quanto seu investimento vai render ao longo do tempo")
     
@@ -40,14 +101,7 @@ with tab1:
     
     with col2:
         if st.button("Calcular Juros Compostos", type="primary", use_container_width=True):
-            i = taxa_jc / 100
-            
-            fv_principal = pv_jc * ((1 + i) ** periodo_jc)
-            fv_aportes = aporte_jc * (((1 + i) ** periodo_jc - 1) / i) if i > 0 else aporte_jc * periodo_jc
-            fv_total = fv_principal + fv_aportes
-            
-            total_investido = pv_jc + (aporte_jc * periodo_jc)
-            rendimento = fv_total - total_investido
+            fv_total, total_investido, rendimento = juros_compostos(pv_jc, taxa_jc, periodo_jc, aporte_jc)
             
             st.markdown(f'<div class="big-number">R$ {fv_total:,.2f}</div>', unsafe_allow_html=True)
             
@@ -60,23 +114,17 @@ with tab1:
                 st.metric("Rentabilidade", f"{(rendimento/total_investido)*100:.2f}%")
     
     if st.checkbox("Mostrar Gráfico de Evolução"):
-        i = taxa_jc / 100
-        meses = list(range(periodo_jc + 1))
-        valores_investidos = [pv_jc + (aporte_jc * m) for m in meses]
-        valores_futuros = []
-        
-        for m in meses:
-            fv_p = pv_jc * ((1 + i) ** m)
-            fv_a = aporte_jc * (((1 + i) ** m - 1) / i) if i > 0 and m > 0 else 0
-            valores_futuros.append(fv_p + fv_a)
-        
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=meses, y=valores_investidos, name="Investido", line=dict(color="orange")))
-        fig.add_trace(go.Scatter(x=meses, y=valores_futuros, name="Valor Total", line=dict(color="green")))
-        fig.update_layout(title="Evolução do Investimento", xaxis_title="Meses", yaxis_title="Valor (R$)", height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = grafico_juros_compostos(pv_jc, taxa_jc, periodo_jc, aporte_jc)
+        mostrar_grafico("Parcelas — juros compostos", fig)
 
-with tab3:
+
+with tab1:
+    aba_juros_compostos()
+
+
+@st.fragment
+@timed_section("Parcelas — PMT e amortização")
+def aba_parcelas():
     st.header("Cálculo de Parcelas (PMT)")
     st.write("Calcule o valor das parcelas de um financiamento ou investimento")
     
@@ -90,17 +138,11 @@ with tab3:
     
     with col2:
         if st.button("Calcular Parcela", type="primary", use_container_width=True, key="calc_pmt"):
-            i = taxa_pmt / 100
-            
-            if tipo_pmt == "Postecipado (fim do período)":
-                pmt = pv_pmt * (i * (1 + i)**n_pmt) / ((1 + i)**n_pmt - 1)
-            else:
-                pmt = pv_pmt * (i * (1 + i)**n_pmt) / (((1 + i)**n_pmt - 1) * (1 + i))
-            
-            total_pago = pmt * n_pmt
-            juros_total = total_pago - pv_pmt
+            parcela, total_pago, juros_total = calcular_parcela(
+                pv_pmt, taxa_pmt, n_pmt, tipo_pmt == "Antecipado (início do período)"
+            )
             
-            st.markdown(f'<div class="big-number">R$ {pmt:,.2f}</div>', unsafe_allow_html=True)
+            st.markdown(f'<div class="big-number">R$ {parcela:,.2f}</div>', unsafe_allow_html=True)
             
             m1, m2, m3 = st.columns(3)
             with m1:
@@ -111,29 +153,167 @@ with tab3:
                 st.metric("Juros Total", f"R$ {juros_total:,.2f}")
     
     if st.checkbox("Mostrar Tabela de Amortização", key="show_amort"):
-        i = taxa_pmt / 100
-        if tipo_pmt == "Postecipado (fim do período)":
-            pmt = pv_pmt * (i * (1 + i)**n_pmt) / ((1 + i)**n_pmt - 1)
-        else:
-            pmt = pv_pmt * (i * (1 + i)**n_pmt) / (((1 + i)**n_pmt - 1) * (1 + i))
+        col3, col4, col5 = st.columns(3)
+        
+        with col3:
+            sistema = st.radio("Sistema de Amortização", ["Price", "SAC"], horizontal=True, key="sistema_amort")
+        with col4:
+            extra_valor = st.number_input("Amortização extra recorrente (R$)", value=0.0, min_value=0.0, step=100.0, format="%.2f", key="extra_valor")
+            extra_intervalo = st.number_input("A cada (meses)", value=12, step=1, min_value=1, key="extra_intervalo")
+        with col5:
+            extra_unica = st.number_input("Amortização extra única (R$)", value=0.0, min_value=0.0, step=1000.0, format="%.2f", key="extra_unica")
+            extra_unica_mes = st.number_input("No mês", value=12, step=1, min_value=1, key="extra_unica_mes")
+        
+        pagamentos_extras = {}
+        if extra_valor > 0:
+            pagamentos_extras = dict.fromkeys(range(extra_intervalo, n_pmt + 1, extra_intervalo), extra_valor)
+        if extra_unica > 0:
+            pagamentos_extras[extra_unica_mes] = pagamentos_extras.get(extra_unica_mes, 0.0) + extra_unica
         
-        tabela = []
-        saldo = pv_pmt
+        df_amort, fig_amort, csv_amort = amortizacao(
+            sistema, pv_pmt, taxa_pmt, n_pmt, tipo_pmt == "Antecipado (início do período)", pagamentos_extras
+        )
         
-        for mes in range(1, n_pmt + 1):
-            juros = saldo * i
-            amortizacao = pmt - juros
-            saldo -= amortizacao
+        ultima = df_amort.iloc[-1]
+        m1, m2, m3 = st.columns(3)
+        with m1:
+            st.metric("Prazo Efetivo", f"{len(df_amort)} meses", f"{len(df_amort) - n_pmt}" if len(df_amort) != n_pmt else None, delta_color="inverse")
+        with m2:
+            st.metric("Juros Total", f"R$ {ultima['Juros Acumulados']:,.2f}")
+        with m3:
+            st.metric("Total Pago", f"R$ {ultima['Total Pago']:,.2f}")
+        
+        mostrar_grafico("Parcelas — amortização", fig_amort)
+        
+        p1, p2 = st.columns([1, 3])
+        with p1:
+            linhas = st.selectbox("Linhas por página", [12, 24, 60, 120], index=2, key="amort_linhas")
+        paginas = -(-len(df_amort) // linhas)
+        with p2:
+            pagina = st.number_input("Página", value=1, step=1, min_value=1, max_value=paginas)
+        
+        inicio = (pagina - 1) * linhas
+        st.dataframe(
+            df_amort.iloc[inicio:inicio + linhas],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                col: st.column_config.NumberColumn(format="R$ %.2f")
+                for col in df_amort.columns if col != "Mês"
+            }
+        )
+        st.caption(f"Página {pagina} de {paginas} — {len(df_amort)} parcelas")
+        st.download_button(
+            "Baixar tabela completa (CSV)",
+            csv_amort,
+            file_name=f"amortizacao_{sistema.lower()}.csv",
+            mime="text/csv"
+        )
+
+
+with tab3:
+    aba_parcelas()
+
+
+@st.fragment
+@timed_section("Parcelas — comparação de ofertas")
+def aba_ofertas():
+    st.header("Taxa Implícita e CET")
+    st.write("Descubra a taxa embutida em uma parcela e compare ofertas de crédito")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        pv_inv = st.number_input("Valor Liberado (PV)", value=50000.0, step=5000.0, format="%.2f", key="pv_inv")
+        parcela_inv = st.number_input("Valor da Parcela", value=1700.0, step=50.0, format="%.2f", key="parcela_inv")
+        n_inv = st.number_input("Número de Parcelas", value=36, step=1, min_value=1, key="n_inv")
+        tarifas_inv = st.number_input("Tarifas e Seguros à Vista (R$)", value=0.0, min_value=0.0, step=100.0, format="%.2f", key="tarifas_inv")
+        tipo_inv = st.radio("Tipo de Pagamento", ["Postecipado (fim do período)", "Antecipado (início do período)"], key="tipo_inv")
+    
+    with col2:
+        due_inv = tipo_inv == "Antecipado (início do período)"
+        taxa_inv = implied_rate(pv_inv, parcela_inv, n_inv, due=due_inv)
+        cet_inv = implied_rate(pv_inv - tarifas_inv, parcela_inv, n_inv, due=due_inv)
+        
+        if np.isnan(taxa_inv):
+            st.warning("A soma das parcelas precisa ser maior que o valor liberado.")
+        else:
+            st.markdown(f'<div class="big-number">{taxa_inv * 100:.4f}% a.m.</div>', unsafe_allow_html=True)
             
-            tabela.append({
-                "Mês": mes,
-                "Saldo Inicial": f"R$ {saldo + amortizacao:,.2f}",
-                "Juros": f"R$ {juros:,.2f}",
-                "Amortização": f"R$ {amortizacao:,.2f}",
-                "Parcela": f"R$ {pmt:,.2f}",
-                "Saldo Final": f"R$ {max(0, saldo):,.2f}"
-            })
+            m1, m2, m3 = st.columns(3)
+            with m1:
+                st.metric("Taxa Anual", f"{annual_rate(taxa_inv) * 100:.2f}%")
+            with m2:
+                st.metric("CET Mensal", f"{cet_inv * 100:.4f}%" if not np.isnan(cet_inv) else "-")
+            with m3:
+                st.metric("CET Anual", f"{annual_rate(cet_inv) * 100:.2f}%" if not np.isnan(cet_inv) else "-")
+    
+    st.subheader("Comparação em Lote")
+    st.write(
+        "Envie um CSV com as colunas **Valor**, **Parcela** e **Prazo** "
+        "(opcionais: **Instituição**, **Tarifas**, **Tarifa Mensal**)"
+    )
+    
+    modelo = pd.DataFrame({
+        "Instituição": ["Banco A", "Banco B"],
+        "Valor": [50000.0, 50000.0],
+        "Parcela": [1720.0, 1690.0],
+        "Prazo": [36, 36],
+        "Tarifas": [0.0, 1200.0],
+        "Tarifa Mensal": [0.0, 15.0],
+    })
+    st.download_button("Baixar modelo (CSV)", modelo.to_csv(index=False).encode("utf-8"), file_name="ofertas_modelo.csv", mime="text/csv")
+    
+    arquivo = st.file_uploader("Arquivo de ofertas", type="csv", key="ofertas_csv")
+    if arquivo is not None:
+        try:
+            with span("compute", "comparação de ofertas"):
+                ofertas = compare_offers(pd.read_csv(arquivo), due=due_inv)
+        except (ValueError, pd.errors.ParserError) as e:
+            st.error(f"Erro ao ler ofertas: {str(e)}")
+            ofertas = None
         
-        df_amort = pd.DataFrame(tabela)
-        st.dataframe(df_amort, use_container_width=True, height=400)
-st.divider()
\ No newline at end of file
+        if ofertas is not None and ofertas.empty:
+            st.info("O arquivo não tem nenhuma oferta.")
+        elif ofertas is not None:
+            invalidas = ofertas["CET Anual (%)"].isna().sum()
+            if not ofertas["CET Anual (%)"].notna().any():
+                st.info("Nenhuma oferta tem taxa válida: confira valores, parcelas e prazos.")
+            else:
+                if invalidas:
+                    st.warning(f"{invalidas} oferta(s) sem taxa válida foram colocadas no fim do ranking.")
+                
+                melhor = ofertas.iloc[0]
+                m1, m2, m3 = st.columns(3)
+                with m1:
+                    st.metric("Ofertas Analisadas", f"{len(ofertas)}")
+                with m2:
+                    st.metric("Melhor CET Anual", f"{melhor['CET Anual (%)']:.2f}%")
+                with m3:
+                    st.metric("Melhor Oferta", f"{melhor['Instituição'] or '-'}")
+            
+            st.dataframe(
+                ofertas,
+                hide_index=True,
+                use_container_width=True,
+                height=400,
+                column_config={
+                    "Valor": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Parcela": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Tarifas": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Tarifa Mensal": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Taxa Mensal (%)": st.column_config.NumberColumn(format="%.4f%%"),
+                    "CET Mensal (%)": st.column_config.NumberColumn(format="%.4f%%"),
+                    "CET Anual (%)": st.column_config.NumberColumn(format="%.2f%%"),
+                    "Total Pago": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Custo Total": st.column_config.NumberColumn(format="R$ %.2f"),
+                }
+            )
+
+
+with tab4:
+    aba_ofertas()
+
+st.divider()
+
+fim_da_execucao("Parcelas", inicio_execucao)
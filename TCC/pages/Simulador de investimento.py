@@ -1,53 +1,93 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
+import time
+from datetime import datetime, timedelta
+
+from core.projection import compound_with_contributions, sweep
+from core import fetch
+from core.charts import line_figure
+from core.debug import fim_da_execucao, mostrar_grafico
+from core.indice import IndiceAcumulado, backtest_aportes, somar_meses
+from core.lots import simulate_lots
+from core.memo import memoize
+from core.montecarlo import paired_history, simulate
+from core.perf import counted_cache, span, timed_section
+from core.recursos import process_pool, sgs_store
+from core.sgs import taxa_mensal
+from core.tax import apply_tax_and_inflation, ir_rate_by_days
+
+inicio_execucao = time.perf_counter()
 
 st.set_page_config(page_title="Simulador de investimentos — Renda Fixa", layout="wide")
 
-def ir_rate_by_days(days):
-    if days <= 180:
-        return 0.225
-    elif days <= 360:
-        return 0.20
-    elif days <= 720:
-        return 0.175
-    else:
-        return 0.15
 
+@counted_cache("load_history", st.cache_data(ttl=3600))
+def load_history(rate_code, history_years):
+    start = datetime.today() - timedelta(days=history_years * 365)
+    with span("fetch", "sgs — histórico"):
+        rates = taxa_mensal(sgs_store().serie(rate_code, start), rate_code)
+        inflation = taxa_mensal(sgs_store().serie(433, start), 433)
+    return paired_history(rates, inflation)
 
-def compound_lump_sum(principal, annual_rate, years, compounds_per_year=12):
-    r = annual_rate
-    n = compounds_per_year
-    t = years
-    fv = principal * (1 + r / n) ** (n * t)
-    return fv
 
+# cache_resource: o mesmo objeto em todos os reruns e sessões, para que as
+# variantes (% do CDI + spread) calculadas por ele continuem valendo.
+@counted_cache("load_index", st.cache_resource(ttl=3600, show_spinner=False))
+def load_index(rate_code, history_years):
+    start = datetime.today() - timedelta(days=history_years * 365)
+    with span("fetch", "sgs — índice diário"):
+        df = sgs_store().serie(rate_code, start)
+    return IndiceAcumulado.da_serie(df, rate_code)
 
-def compound_with_contributions(principal, monthly_contribution, annual_rate, years):
-    months = int(years * 12)
-    monthly_rate = annual_rate / 12
 
-    balance = principal
-    records = []
-    for m in range(1, months + 1):
-        balance = balance * (1 + monthly_rate)
-        balance += monthly_contribution
-        records.append({"Mes": m, "Saldo": balance})
+# Limite da grade: a inflação multiplica o resultado real (8 bytes por cenário),
+# e cada entrada do cache é serializada inteira.
+MAX_SCENARIOS = 2_000_000
+
+
+@counted_cache("run_sweep", st.cache_data(max_entries=8, show_spinner=False))
+def run_sweep(principal, annual_rates, years, contributions, inflation_rates):
+    with span("compute", "varredura"):
+        return sweep(principal, annual_rates, years, contributions, inflation_rates)
+
 
-    df = pd.DataFrame(records)
-    df["Ano"] = (df["Mes"] / 12).apply(lambda x: int(np.floor(x)) + 1)
-    return df
+@counted_cache("run_lots", st.cache_data(max_entries=32, show_spinner=False))
+def run_lots(principal, contribution, monthly_rate, months, withdrawals, come_cotas, start_month):
+    with span("compute", "lotes de IR"):
+        return simulate_lots(
+            principal, contribution, monthly_rate, months,
+            withdrawals=withdrawals, come_cotas=come_cotas, start_month=start_month,
+        )
+
+
+@counted_cache("run_monte_carlo", st.cache_data(max_entries=32))
+def run_monte_carlo(rates, inflation, principal, contribution, years, paths, block, seed, use_processes):
+    pool = process_pool() if use_processes else None
+    with span("compute", "monte carlo"):
+        return simulate(rates, inflation, principal, contribution, years, paths=paths, block=block, seed=seed, pool=pool)
+
+
+# Guardado por referência e compartilhado entre sessões: o resumo não é
+# alterado depois. O Styler é montado a cada execução, porque o st.dataframe
+# o modifica ao renderizar.
+@memoize("projecao")
+def projecao(initial_aporte, monthly_aporte, annual_rate, years, days_per_month, inflation_rate):
+    with span("compute", "projeção"):
+        df_sim = compound_with_contributions(initial_aporte, monthly_aporte, annual_rate, years, days_per_month)
+    fv_monthly = df_sim.iloc[-1]["Saldo"] if not df_sim.empty else initial_aporte
+    total_invested = initial_aporte + monthly_aporte * years * 12
 
+    tax_info = apply_tax_and_inflation(fv_monthly, total_invested, years, inflation_rate=inflation_rate)
 
-def apply_tax_and_inflation(gross, principal, years, inflation_rate=0.0):
-    invested = principal
-    gain = gross - invested
-    days = int(years * 365)
-    aliquot = ir_rate_by_days(days)
-    tax = gain * aliquot
-    net = gross - tax
-    real_net = net / ((1 + inflation_rate) ** years)
-    return {"gross": gross, "tax": tax, "net": net, "real_net": real_net, "aliquot": aliquot}
+    df_sim["Ano"] = ((df_sim["Mes"] - 1) // 12) + 1
+    resumo = df_sim.groupby("Ano")["Saldo"].last().reset_index()
+    resumo["Total Investido (R$)"] = initial_aporte + monthly_aporte * (resumo["Ano"] * 12)
+    resumo["Ganho Bruto (R$)"] = resumo["Saldo"] - resumo["Total Investido (R$)"]
+    resumo["Saldo (R$)"] = resumo["Saldo"]
+    resumo_display = resumo[["Ano", "Total Investido (R$)", "Saldo (R$)", "Ganho Bruto (R$)"]]
+    return fv_monthly, total_invested, tax_info["net"], resumo_display
 
 
 st.title("Simulador de investimentos — Renda Fixa & Simulação")
@@ -97,6 +137,12 @@ with col3:
         format="%.2f"
     )
 
+    granularity = st.radio(
+        "Capitalização",
+        ["Mensal", "Diária (ano comercial de 360 dias)"],
+        horizontal=True
+    )
+
 annual_rate = annual_rate_pct / 100.0
 inflation_rate = inflation_pct / 100.0
 
@@ -119,24 +165,15 @@ st.header("Simulação — Aporte Inicial + Aportes Mensais")
 if monthly_aporte == 0 and initial_aporte == 0:
     st.warning("Insira pelo menos um aporte inicial ou aporte mensal para simular.")
 else:
-    df_sim = compound_with_contributions(initial_aporte, monthly_aporte, annual_rate, years)
-    fv_monthly = df_sim.iloc[-1]["Saldo"] if not df_sim.empty else initial_aporte
-    total_invested = initial_aporte + monthly_aporte * years * 12
-
-    tax_info2 = apply_tax_and_inflation(fv_monthly, total_invested, years, inflation_rate=inflation_rate)
+    days_per_month = 30 if granularity.startswith("Diária") else 1
+    fv_monthly, total_invested, net, resumo_display = projecao(
+        initial_aporte, monthly_aporte, annual_rate, years, days_per_month, inflation_rate
+    )
 
     m1, m2, m3 = st.columns(3)
     m1.metric("Valor final bruto (R$)", f"{fv_monthly:,.2f}")
     m2.metric("Total investido (R$)", f"{total_invested:,.2f}")
-    m3.metric("Ganho líquido após IR (R$)", f"{tax_info2['net'] - total_invested:,.2f}")
-
-    df_sim["Ano"] = ((df_sim["Mes"] - 1) // 12) + 1
-    resumo = df_sim.groupby("Ano")["Saldo"].last().reset_index()
-    resumo["Total Investido (R$)"] = resumo["Ano"].apply(lambda a: initial_aporte + monthly_aporte * (a * 12))
-    resumo["Ganho Bruto (R$)"] = resumo["Saldo"] - resumo["Total Investido (R$)"]
-    resumo["Saldo (R$)"] = resumo["Saldo"]
-
-    resumo_display = resumo[["Ano", "Total Investido (R$)", "Saldo (R$)", "Ganho Bruto (R$)"]].copy()
+    m3.metric("Ganho líquido após IR (R$)", f"{net - total_invested:,.2f}")
 
     st.subheader("Evolução Anual do Investimento")
     st.dataframe(resumo_display.style.format({
@@ -147,3 +184,368 @@ else:
 
 st.markdown("---")
 
+st.header("Imposto de Renda por Aporte")
+
+@st.fragment
+@timed_section("Simulador — IR por aporte")
+def secao_lotes(initial_aporte, monthly_aporte, annual_rate, years):
+    st.caption(
+        "Cada aporte mensal é um lote com prazo próprio e cai na sua faixa da tabela regressiva "
+        "(22,5% / 20% / 17,5% / 15%); resgates consomem os lotes mais antigos primeiro."
+    )
+    if st.checkbox("Calcular IR por aporte", key="lots_mode"):
+        months = int(years * 12)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            come_cotas = st.checkbox("Come-cotas (maio e novembro)", key="lots_come_cotas")
+        with col2:
+            withdrawal = st.number_input("Resgate periódico (R$)", min_value=0.0, value=0.0, step=500.0, format="%.2f")
+        with col3:
+            first_year = st.number_input("A partir do ano", min_value=1, max_value=int(years), value=1, step=1)
+            every = st.number_input("A cada (meses)", min_value=1, max_value=120, value=12, step=1, key="lots_every")
+
+        withdrawals = {}
+        if withdrawal > 0:
+            withdrawals = dict.fromkeys(range(int(first_year) * 12, months + 1, int(every)), withdrawal)
+
+        # A aplicação começa no mês corrente: é ele que decide quando cai o primeiro come-cotas.
+        lots = run_lots(
+            initial_aporte, monthly_aporte, annual_rate / 12, months, withdrawals, come_cotas, datetime.now().month
+        )
+        single = ir_rate_by_days(int(years * 365))
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Valor líquido final (R$)", f"{lots['net'][0]:,.2f}")
+        m2.metric("Resgatado líquido (R$)", f"{lots['withdrawn_net'][0]:,.2f}")
+        m3.metric("IR total (R$)", f"{lots['tax'][0]:,.2f}")
+        m4.metric(
+            "Alíquota efetiva",
+            f"{lots['effective_rate'][0] * 100:.2f}%",
+            f"{(lots['effective_rate'][0] - single) * 100:+.2f} p.p. vs. faixa única",
+            delta_color="inverse",
+        )
+
+        detail = lots["lots"]
+        df_lots = pd.DataFrame({
+            "Alíquota": detail["aliquot"],
+            "Lotes": 1,
+            "Aportado (R$)": detail["amount"],
+            "Ganho (R$)": detail["gain"][0],
+            "IR no resgate final (R$)": detail["tax"][0],
+        })
+        df_brackets = df_lots.groupby("Alíquota").sum().sort_index(ascending=False).reset_index()
+        df_brackets["Alíquota"] = df_brackets["Alíquota"].map(lambda a: f"{a * 100:.1f}%")
+        st.dataframe(
+            df_brackets.style.format({c: "R$ {:,.2f}" for c in df_brackets.columns if c.endswith("(R$)")}),
+            hide_index=True,
+            use_container_width=True,
+        )
+        if come_cotas:
+            st.caption(f"Come-cotas recolhido ao longo do período: R$ {lots['come_cotas'][0]:,.2f}")
+
+
+secao_lotes(initial_aporte, monthly_aporte, annual_rate, years)
+
+st.markdown("---")
+
+
+st.header("Análise de Sensibilidade — Varredura de Cenários")
+
+@st.fragment
+@timed_section("Simulador — varredura de cenários")
+def secao_varredura(initial_aporte):
+    if st.checkbox("Ativar varredura de cenários", key="sweep_mode"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            rate_range = st.slider("Taxa anual nominal (%)", 0.0, 30.0, (4.0, 16.0), step=0.25)
+            rate_steps = st.number_input("Pontos de taxa", min_value=2, max_value=200, value=25, step=1)
+            years_range = st.slider("Horizonte (anos)", 1, 50, (1, 30), key="sweep_years")
+
+        with col2:
+            contribution_range = st.slider("Aporte mensal (R$)", 0.0, 20000.0, (0.0, 2000.0), step=50.0)
+            contribution_steps = st.number_input("Pontos de aporte", min_value=2, max_value=200, value=21, step=1)
+            inflation_range = st.slider("Inflação anual (%)", 0.0, 15.0, (2.0, 6.0), step=0.25)
+            inflation_steps = st.number_input("Pontos de inflação", min_value=1, max_value=50, value=5, step=1)
+
+        axes = {
+            "Taxa (%)": np.linspace(*rate_range, int(rate_steps)),
+            "Horizonte (anos)": np.arange(years_range[0], years_range[1] + 1),
+            "Aporte (R$)": np.linspace(*contribution_range, int(contribution_steps)),
+            "Inflação (%)": np.linspace(*inflation_range, int(inflation_steps)),
+        }
+
+        scenarios = int(np.prod([len(v) for v in axes.values()]))
+        if scenarios > MAX_SCENARIOS:
+            st.warning(
+                f"{scenarios:,} cenários passam do limite de {MAX_SCENARIOS:,}; "
+                "reduza o número de pontos ou os intervalos.".replace(",", ".")
+            )
+            return
+
+        grid = run_sweep(
+            initial_aporte,
+            axes["Taxa (%)"] / 100.0,
+            axes["Horizonte (anos)"],
+            axes["Aporte (R$)"],
+            axes["Inflação (%)"] / 100.0,
+        )
+
+        st.caption(f"{scenarios:,} cenários calculados".replace(",", "."))
+
+        metrics = {
+            "Valor final bruto (R$)": "gross",
+            "Valor líquido após IR (R$)": "net",
+            "Valor real líquido (R$)": "real_net",
+        }
+        names = list(axes)
+
+        col3, col4, col5 = st.columns(3)
+        with col3:
+            metric_label = st.selectbox("Métrica", list(metrics))
+        with col4:
+            y_name = st.selectbox("Eixo vertical", names, index=0)
+        with col5:
+            x_name = st.selectbox("Eixo horizontal", [n for n in names if n != y_name], index=0)
+
+        index = []
+        fixed_cols = st.columns(2)
+        fixed_names = [n for n in names if n not in (x_name, y_name)]
+        for col, name in zip(fixed_cols, fixed_names):
+            with col:
+                values = axes[name]
+                chosen = st.select_slider(
+                    f"{name} fixo",
+                    options=list(range(len(values))),
+                    value=len(values) // 2,
+                    format_func=lambda i, v=values: f"{v[i]:,.2f}",
+                    key=f"fixed_{name}"
+                )
+            index.append((names.index(name), chosen))
+
+        selector = [slice(None)] * len(names)
+        for dim, pos in index:
+            selector[dim] = pos
+        selector = tuple(selector)
+        transpose = names.index(y_name) > names.index(x_name)
+
+        def grid_slice(key):
+            values = np.broadcast_to(grid[key], grid["shape"])[selector]
+            return values.T if transpose else values
+
+        heat = grid_slice(metrics[metric_label])
+        import plotly.express as px
+
+        fig_heat = px.imshow(
+            heat,
+            x=axes[x_name],
+            y=axes[y_name],
+            labels={"x": x_name, "y": y_name, "color": metric_label},
+            color_continuous_scale="Viridis",
+            origin="lower",
+            aspect="auto",
+            title=f"{metric_label} — {y_name} × {x_name}"
+        )
+        fig_heat.update_layout(height=550)
+        mostrar_grafico("Simulador — mapa de calor", fig_heat)
+
+        yy, xx = np.meshgrid(axes[y_name], axes[x_name], indexing="ij")
+        df_sweep = pd.DataFrame({
+            y_name: yy.ravel(),
+            x_name: xx.ravel(),
+            "Total Investido (R$)": grid_slice("invested").ravel(),
+            "Valor final bruto (R$)": grid_slice("gross").ravel(),
+            "IR (R$)": grid_slice("tax").ravel(),
+            "Valor líquido após IR (R$)": grid_slice("net").ravel(),
+            "Valor real líquido (R$)": grid_slice("real_net").ravel(),
+        })
+
+        st.subheader("Tabela de Cenários")
+        st.dataframe(
+            df_sweep.sort_values(metric_label, ascending=False),
+            hide_index=True,
+            use_container_width=True,
+            height=400,
+            column_config={
+                col: st.column_config.NumberColumn(format="R$ %.2f")
+                for col in df_sweep.columns if col.endswith("(R$)") and col != "Aporte (R$)"
+            }
+        )
+
+
+secao_varredura(initial_aporte)
+
+st.markdown("---")
+
+st.header("Simulação Estocástica — Monte Carlo com Histórico do BCB")
+
+@st.fragment
+@timed_section("Simulador — Monte Carlo")
+def secao_monte_carlo(initial_aporte, monthly_aporte, years):
+    if st.checkbox("Ativar simulação de Monte Carlo", key="mc_mode"):
+        indexers = {"CDI": 12, "SELIC": 1178}
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            indexer = st.selectbox("Indexador", list(indexers))
+            indexer_pct = st.number_input("Percentual do indexador (%)", min_value=0.0, value=100.0, step=5.0)
+        with col2:
+            history_years = st.slider("Histórico utilizado (anos)", min_value=3, max_value=25, value=10)
+            block = st.number_input("Tamanho do bloco (meses)", min_value=1, max_value=60, value=12, step=1)
+        with col3:
+            paths = st.number_input("Número de trajetórias", min_value=1000, max_value=1_000_000, value=100_000, step=10_000)
+            seed = st.number_input("Semente", min_value=0, value=42, step=1)
+            use_processes = st.checkbox("Usar todos os núcleos", value=False)
+
+        try:
+            with st.spinner("Carregando histórico do Banco Central..."):
+                rates, inflation = load_history(indexers[indexer], history_years)
+        except (fetch.RequestException, ValueError) as e:
+            st.error(f"Erro ao buscar dados: {str(e)}")
+            rates = None
+
+        if rates is not None and len(rates) >= 12:
+            with st.spinner("Simulando trajetórias..."):
+                mc = run_monte_carlo(
+                    rates * indexer_pct / 100.0, inflation, initial_aporte, monthly_aporte, years,
+                    int(paths), int(block), int(seed), use_processes
+                )
+
+            st.caption(
+                f"{int(paths):,} trajetórias com {len(rates)} meses de histórico de {indexer} e IPCA".replace(",", ".")
+            )
+
+            median = mc["percentiles"].index(50)
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Mediana líquida (R$)", f"{mc['net'][median][-1]:,.2f}")
+            m2.metric("Mediana real líquida (R$)", f"{mc['real_net'][median][-1]:,.2f}")
+            m3.metric("Prob. perda real", f"{mc['prob_real_loss'] * 100:.1f}%")
+
+            tab_nominal, tab_real = st.tabs(["Líquido nominal", "Líquido real"])
+            for tab, key in ((tab_nominal, "net"), (tab_real, "real_net")):
+                with tab:
+                    bands = mc[key]
+                    fig_mc = go.Figure()
+                    for (low, high), alpha in (((0, 4), 0.15), ((1, 3), 0.3)):
+                        fig_mc.add_trace(go.Scatter(
+                            x=np.concatenate([mc["years"], mc["years"][::-1]]),
+                            y=np.concatenate([bands[high], bands[low][::-1]]),
+                            fill="toself", fillcolor=f"rgba(30, 58, 138, {alpha})",
+                            line=dict(width=0), hoverinfo="skip",
+                            name=f"P{mc['percentiles'][low]}–P{mc['percentiles'][high]}"
+                        ))
+                    fig_mc.add_trace(go.Scatter(x=mc["years"], y=bands[median], name="Mediana", line=dict(color="#1e3a8a")))
+                    fig_mc.add_trace(go.Scatter(x=mc["years"], y=mc["invested"], name="Total investido", line=dict(color="orange", dash="dash")))
+                    fig_mc.update_layout(xaxis_title="Anos", yaxis_title="Valor (R$)", height=450)
+                    mostrar_grafico("Simulador — monte carlo", fig_mc)
+
+            df_mc = pd.DataFrame(index=pd.Index(mc["years"], name="Ano"))
+            for i, p in enumerate(mc["percentiles"]):
+                df_mc[f"P{p} líquido (R$)"] = mc["net"][i]
+            for i, p in enumerate(mc["percentiles"]):
+                df_mc[f"P{p} real (R$)"] = mc["real_net"][i]
+            st.dataframe(df_mc.style.format("R$ {:,.2f}"), use_container_width=True, height=400)
+        elif rates is not None:
+            st.warning("Histórico insuficiente para a simulação.")
+
+
+secao_monte_carlo(initial_aporte, monthly_aporte, years)
+
+st.markdown("---")
+
+st.header("Backtest — Histórico Real do CDI/SELIC")
+
+# A versão do índice (última data) entra na chave: quando o SGS traz dados
+# novos, o resultado antigo deixa de ser usado.
+@memoize("backtest_janelas", max_entries=64)
+def backtest_janelas(indexer, history_years, versao, indexer_pct, spread_pct,
+                     initial_aporte, monthly_aporte, years, annual_rate, _index):
+    months = int(years * 12)
+    # Todas as datas de início cuja janela de `years` anos cabe no histórico.
+    starts = _index.datas[somar_meses(_index.datas, months) <= _index.fim]
+    if len(starts) == 0:
+        return None, None, None
+
+    with span("compute", "backtest"):
+        bt = backtest_aportes(
+            _index, starts, months, initial_aporte, monthly_aporte,
+            indexer_pct / 100.0, spread_pct / 100.0
+        )
+    flat = compound_with_contributions(initial_aporte, monthly_aporte, annual_rate, years)["Saldo"].iloc[-1]
+
+    fig_bt = line_figure(
+        pd.to_datetime(bt["inicio"]),
+        {"Valor líquido (R$)": bt["net"], "Valor bruto (R$)": bt["gross"]},
+        colors=["#1e3a8a", "#94a3b8"],
+    )
+    fig_bt.add_hline(y=bt["invested"], line_dash="dash", line_color="orange", annotation_text="Total investido")
+    fig_bt.update_layout(
+        title=f"Resultado por data de início ({indexer_pct:.0f}% do {indexer})",
+        xaxis_title="Data de início", yaxis_title="Valor (R$)", height=450
+    )
+    return bt, flat, fig_bt
+
+
+@st.fragment
+@timed_section("Simulador — backtest")
+def secao_backtest(initial_aporte, monthly_aporte, years, annual_rate):
+    if st.checkbox("Ativar backtest com histórico real", key="backtest_mode"):
+        indexers = {"CDI": 12, "SELIC": 11}
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            indexer = st.selectbox("Indexador", list(indexers), key="bt_indexer")
+        with col2:
+            indexer_pct = st.number_input("Percentual do indexador (%)", min_value=0.0, value=100.0, step=5.0, key="bt_pct")
+            spread_pct = st.number_input("Spread (% a.a.)", value=0.0, step=0.25, format="%.2f", key="bt_spread")
+        with col3:
+            history_years = st.slider("Histórico (anos)", min_value=5, max_value=30, value=20, key="bt_history")
+
+        try:
+            with st.spinner("Carregando histórico do Banco Central..."):
+                index = load_index(indexers[indexer], history_years)
+        except (fetch.RequestException, ValueError) as e:
+            st.error(f"Erro ao buscar dados: {str(e)}")
+            return
+
+        bt, flat, fig_bt = backtest_janelas(
+            indexer, history_years, str(index.fim), indexer_pct, spread_pct,
+            initial_aporte, monthly_aporte, years, annual_rate, _index=index
+        )
+        if bt is None:
+            st.warning("Histórico mais curto que o horizonte escolhido.")
+            return
+        starts = bt["inicio"]
+
+        windows = f"{len(starts):,}".replace(",", ".")
+        st.caption(
+            f"{windows} janelas de {years} anos, com início entre "
+            f"{pd.Timestamp(starts[0]):%d/%m/%Y} e {pd.Timestamp(starts[-1]):%d/%m/%Y}"
+        )
+
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric(
+            "Janela mais recente — bruto (R$)", f"{bt['gross'][-1]:,.2f}",
+            f"{bt['gross'][-1] - flat:+,.2f} vs. taxa fixa"
+        )
+        m2.metric("Janela mais recente — líquido (R$)", f"{bt['net'][-1]:,.2f}")
+        m3.metric("Pior janela — líquido (R$)", f"{bt['net'].min():,.2f}")
+        m4.metric("Melhor janela — líquido (R$)", f"{bt['net'].max():,.2f}")
+
+        mostrar_grafico("Simulador — backtest", fig_bt)
+
+        quantiles = np.percentile(bt["net"], [5, 50, 95])
+        annual = np.percentile(bt["annual_rate"], [5, 50, 95]) * 100
+        st.dataframe(pd.DataFrame({
+            "Percentil": ["P5", "P50", "P95"],
+            "Valor líquido (R$)": quantiles,
+            f"{indexer} anualizado (%)": annual,
+        }).style.format({"Valor líquido (R$)": "R$ {:,.2f}", f"{indexer} anualizado (%)": "{:.2f}%"}),
+            hide_index=True, use_container_width=True)
+
+
+secao_backtest(initial_aporte, monthly_aporte, years, annual_rate)
+
+st.markdown("---")
+
+fim_da_execucao("Simulador", inicio_execucao)
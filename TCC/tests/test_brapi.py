@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from bench.stubs import BrapiStub
+from core import brapi, fetch
+from core.fetch import Fetcher
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = BrapiStub().start()
+    server.desconhecidos = frozenset({"ZZZZ3"})
+    monkeypatch.setattr(brapi, "BASE_URL", server.url)
+    yield server
+    server.stop()
+
+
+def cliente(**kwargs):
+    return brapi.QuoteClient(ttl=60, fetcher=Fetcher(retries=0), snapshot_dir=None, offline=False, **kwargs)
+
+
+def envelhecer(client, segundos):
+    with client._lock:
+        client._cache = {t: (quando - segundos, q) for t, (quando, q) in client._cache.items()}
+        client._watched = {t: quando - segundos for t, quando in client._watched.items()}
+
+
+def test_ticker_inexistente_nao_entra_no_refresh(stub):
+    client = cliente()
+    client.get_quotes(["PETR4", "VALE3"])
+    with pytest.raises(fetch.HTTPError):
+        client.get_quotes(["ZZZZ3"])
+    assert set(client._watched) == {"PETR4", "VALE3"}
+
+    envelhecer(client, 120)
+    antes = client._cache["PETR4"][0]
+    client.refresh()
+    assert client._cache["PETR4"][0] > antes
+    assert client._cache["VALE3"][0] > antes
+
+
+def test_lote_com_erro_nao_derruba_os_outros(stub):
+    client = cliente(max_batch=2)
+    client.get_quotes(["PETR4", "VALE3", "ITUB4"])
+    # Um símbolo que passou a dar 404 depois de entrar (deslistado).
+    client._watched["ZZZZ3"] = time.monotonic()
+    envelhecer(client, 120)
+    antes = {t: client._cache[t][0] for t in ("PETR4", "VALE3", "ITUB4")}
+
+    client.refresh()
+    assert all(client._cache[t][0] > antes[t] for t in antes)
+
+
+def test_simbolo_sem_pedidos_expira(stub):
+    client = cliente(watch_ttls=2)
+    client.get_quotes(["PETR4"])
+    envelhecer(client, 60 * 2 + 1)
+    client.get_quotes(["VALE3"])
+    chamadas = stub.chamadas["cotacao"]
+
+    client.refresh()
+    assert set(client._watched) == {"VALE3"}
+    assert stub.chamadas["cotacao"] == chamadas
+
+
+def test_ticker_inexistente_nao_derruba_a_tabela(stub):
+    client = cliente()
+    cotacoes = client.get_quotes(["PETR4", "ZZZZ3", "VALE3"])
+    assert [c["symbol"] for c in cotacoes] == ["PETR4", "VALE3"]
+    assert set(client._watched) == {"PETR4", "VALE3"}
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from core.amortization import pmt
+from core.loans import compare_offers, implied_rate
+
+
+def test_taxa_implicita_recupera_a_taxa_da_parcela():
+    taxas = np.array([0.005, 0.012, 0.035, 0.2])
+    for due in (False, True):
+        parcelas = np.array([pmt(50_000, i, 36, due=due) for i in taxas])
+        np.testing.assert_allclose(implied_rate(50_000, parcelas, 36, due=due), taxas, rtol=1e-9)
+
+
+def test_antecipado_sem_taxa_possivel():
+    # Uma parcela só, ou parcela acima do valor liberado, paga na assinatura.
+    assert np.isnan(implied_rate(1000, 1100, 1, due=True))
+    assert np.isnan(implied_rate(1000, 1200, 3, due=True))
+
+
+def test_comparacao_sem_ofertas():
+    vazio = pd.DataFrame(columns=["Valor", "Parcela", "Prazo"])
+    assert compare_offers(vazio).empty
+
+
+def test_comparacao_com_todas_invalidas():
+    ofertas = compare_offers(pd.DataFrame({"Valor": [50_000, 1000], "Parcela": [100, "x"], "Prazo": [36, 12]}))
+    assert len(ofertas) == 2
+    assert ofertas["CET Anual (%)"].isna().all()
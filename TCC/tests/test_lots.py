@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from core.lots import _come_cotas_months, simulate_lots
+
+
+def test_come_cotas_no_fim_de_maio_e_novembro():
+    np.testing.assert_array_equal(_come_cotas_months(12, 1), [5, 11])
+    np.testing.assert_array_equal(_come_cotas_months(24, 1), [5, 11, 17, 23])
+    # Começando em junho, o primeiro fim de novembro é t = 6.
+    np.testing.assert_array_equal(_come_cotas_months(12, 6), [6, 12])
+
+
+def test_lotes_de_janeiro_pagam_come_cotas_em_maio():
+    # Até o fim de abril nada foi recolhido; no fim de maio, sim.
+    abril = simulate_lots(10_000, 0, 0.01, 4, come_cotas=True, start_month=1)
+    maio = simulate_lots(10_000, 0, 0.01, 5, come_cotas=True, start_month=1)
+    assert abril["come_cotas"][0] == 0
+    assert maio["come_cotas"][0] > 0
+
+
+def test_come_cotas_segue_o_mes_de_inicio():
+    # Aplicação em outubro: o primeiro come-cotas é no fim de novembro (t = 2).
+    outubro = simulate_lots(10_000, 0, 0.01, 1, come_cotas=True, start_month=10)
+    novembro = simulate_lots(10_000, 0, 0.01, 2, come_cotas=True, start_month=10)
+    assert outubro["come_cotas"][0] == 0
+    assert novembro["come_cotas"][0] > 0
+    np.testing.assert_array_equal(_come_cotas_months(12, 10), [2, 8])
+
+
+def test_resgate_consome_os_lotes_mais_antigos_primeiro():
+    # No mês 12 o aporte inicial vale 10.000 * 1,01^12; o resto do resgate sai
+    # do lote 1, e os lotes seguintes ficam intactos.
+    resultado = simulate_lots(10_000, 1_000, 0.01, 24, withdrawals={12: 12_000})
+    custo = resultado["lots"]["cost"][0]
+    lote0 = 10_000 * 1.01 ** 12
+    lote1 = 1_000 * 1.01 ** 11
+    vendido1 = 12_000 - lote0
+
+    assert resultado["withdrawn_gross"][0] == pytest.approx(12_000)
+    assert custo[0] == pytest.approx(0)
+    assert custo[1] == pytest.approx(1_000 * (1 - vendido1 / lote1))
+    np.testing.assert_allclose(custo[2:], 1_000)
+    # Lote 0 com 365 dias paga 17,5%; lote 1, com 334 dias, 20%.
+    imposto = 0.175 * (lote0 - 10_000) + 0.20 * vendido1 * (1 - 1_000 / lote1)
+    assert resultado["withdrawal_tax"][0] == pytest.approx(imposto)
@@ -0,0 +1,13 @@
+import pytest
+
+from core.portfolio import parse_weights
+
+
+def test_pesos_com_e_sem_valor():
+    assert parse_weights("petr4 30%, VALE3=20; ITUB4") == {"PETR4": 30.0, "VALE3": 20.0, "ITUB4": None}
+
+
+@pytest.mark.parametrize("texto", ["PETR4 0", "PETR4 -10, VALE3 20", "PETR4 nan", "PETR4 abc"])
+def test_pesos_invalidos(texto):
+    with pytest.raises(ValueError):
+        parse_weights(texto)